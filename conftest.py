@@ -0,0 +1,3 @@
+pytest_plugins = ['pytest_ampl']
+
+collect_ignore = ['artifacts', 'temp']
@@ -0,0 +1,245 @@
+"""
+pytest plugin for the AMPL test cases.
+
+Every {module}/{N}.in file becomes a pytest test that runs the same execute, diff
+and (optional) valgrind stages as test.py. The executables are made once per
+session, so the tests can be spread over workers with pytest-xdist.
+
+Usage:
+    pytest [options] [<module or case>...]
+
+Options:
+    --ampl-valgrind         Perform a memory check on the test executables
+    --ampl-stream=<stream>  The stream to diff test (out, err, both, class)
+    --ampl-no-exec-class    Do not execute the compiled AMPL file
+    --ampl-live-diff        Terminate test executables as soon as their output diverges
+
+Examples:
+    pytest scanner parser -n auto               # Run all scanner and parser tests on all CPUs
+    pytest typechecking --lf                    # Rerun the typechecking tests that failed last time
+    pytest codegen/5.in --durations=10          # Run codegen test 5 and list the slowest stages
+"""
+from __future__ import annotations
+
+import importlib.util
+import os
+import shutil
+import sys
+
+import pytest
+
+# The test directory, which holds test.py and the module directories
+ROOT = os.path.dirname(os.path.abspath(__file__))
+_SCRIPT = os.path.join(ROOT, 'test.py')
+# The executables made for the session, in a directory per make target
+_BIN_DIR = os.path.join(ROOT, 'temp', 'pytest-bin')
+
+
+def load_test_script():
+    """
+    Imports test.py, which cannot be imported by name as it would shadow the
+    standard library `test` package.
+
+    :return: The test.py module
+    """
+
+    if 'ampl_test_script' not in sys.modules:
+        spec = importlib.util.spec_from_file_location('ampl_test_script', _SCRIPT)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules['ampl_test_script'] = module
+        spec.loader.exec_module(module)
+
+    return sys.modules['ampl_test_script']
+
+
+def selected_modules(config) -> list[str]:
+    """
+    The modules that the command line arguments select tests from.
+    """
+
+    script = load_test_script()
+
+    modules = set()
+    for arg in config.args:
+        path = os.path.abspath(arg.split('::')[0])
+        relative = os.path.relpath(path, ROOT)
+        if relative == '.' or relative.startswith('..'):
+            modules.update(m for m in script.TESTS if os.path.isdir(os.path.join(ROOT, m)))
+            continue
+
+        module = relative.split(os.sep)[0]
+        if module in script.TESTS:
+            modules.add(module)
+
+    return sorted(modules)
+
+
+def flags(config) -> dict[str, bool]:
+    return {
+        'side-by-side': False,
+        'memory-check': config.getoption('ampl_valgrind'),
+        'exec-class': not config.getoption('ampl_no_exec_class'),
+        'live-diff': config.getoption('ampl_live_diff'),
+    }
+
+
+def make(config, modules: list[str]) -> dict[str, str]:
+    """
+    Makes the executables of the modules like test.py does for several modules:
+    each make target from clean, with its executable copied to its own bin
+    directory, as several targets build the same executable. Modules that fail
+    to make, e.g. because the bin directory is missing, are left out, so their
+    tests fail rather than the session.
+
+    :return: The bin directory of each module that was made successfully
+    """
+
+    script = load_test_script()
+
+    tests = [script.create_test(module, [], flags(config), cwd=ROOT) for module in modules]
+    made = script.Scheduler(tests, _BIN_DIR, 1).make()
+
+    return {os.path.basename(test._test_dir): test._bin_dir for test in made}
+
+
+# ---------------------------------------------------------------------------- #
+# Hooks
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('ampl', 'AMPL test cases')
+    group.addoption('--ampl-valgrind', action='store_true',
+                    help='Perform a memory check on the test executables')
+    group.addoption('--ampl-stream', default='both',
+                    help='The stream to diff test (out, err, both, class)')
+    group.addoption('--ampl-no-exec-class', action='store_true',
+                    help='Do not execute the compiled AMPL file')
+    group.addoption('--ampl-live-diff', action='store_true',
+                    help='Terminate test executables as soon as their output diverges')
+
+
+def pytest_sessionstart(session):
+    config = session.config
+
+    # xdist workers use what the controller made
+    if hasattr(config, 'workerinput'):
+        config.ampl_built = config.workerinput['ampl_built']
+        return
+
+    config.ampl_tests = {}
+
+    # Nothing runs, so there is nothing to make
+    if config.option.collectonly:
+        config.ampl_built = {}
+        return
+
+    if 'JASMIN_JAR' not in os.environ:
+        os.environ['JASMIN_JAR'] = os.path.join(ROOT, 'jasmin.jar')
+
+    config.ampl_built = make(config, selected_modules(config))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    node.workerinput['ampl_built'] = node.config.ampl_built
+
+
+def pytest_collect_file(file_path, parent):
+    name = file_path.name
+    if name.endswith('.in') and not name.endswith('.class.in') \
+            and name[:-len('.in')].isdigit() \
+            and file_path.parent.name in load_test_script().TESTS:
+        return AmplFile.from_parent(parent, path=file_path)
+
+    return None
+
+
+def pytest_sessionfinish(session):
+    config = session.config
+    for test in getattr(config, 'ampl_tests', {}).values():
+        test.clean()
+
+    worker = getattr(config, 'workerinput', {}).get('workerid', 'main')
+    shutil.rmtree(os.path.join(ROOT, 'temp', f'pytest-{worker}'), ignore_errors=True)
+    if worker == 'main':
+        shutil.rmtree(_BIN_DIR, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------- #
+# Collection
+
+
+class AmplFile(pytest.File):
+
+    def collect(self):
+        yield AmplCase.from_parent(self, name=self.path.name[:-len('.in')])
+
+
+class AmplCase(pytest.Item):
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.module = self.path.parent.name
+        self.case = int(self.name)
+
+    def _test(self):
+        """
+        The test of the module, created once per worker with its own temp dir.
+        """
+
+        config = self.config
+        if not hasattr(config, 'ampl_tests'):
+            config.ampl_tests = {}
+
+        if self.module not in config.ampl_tests:
+            worker = getattr(config, 'workerinput', {}).get('workerid', 'main')
+            test = load_test_script().create_test(
+                self.module,
+                [],
+                flags(config),
+                cwd=ROOT,
+                stream=config.getoption('ampl_stream')
+            )
+            test._bin_dir = config.ampl_built[self.module]
+            test._temp_dir = os.path.join(
+                ROOT, 'temp', f'pytest-{worker}', self.module)
+            os.makedirs(test._temp_dir, exist_ok=True)
+            config.ampl_tests[self.module] = test
+
+        return config.ampl_tests[self.module]
+
+    def runtest(self):
+        if self.module not in self.config.ampl_built:
+            raise AmplFailure(f'{self.module} failed to make')
+
+        test = self._test()
+        if test.run_case(self.case):
+            return
+
+        reasons = []
+        if test._returncodes.get(self.case) == -1:
+            reasons.append('timed out')
+        if test._failed_streams.get(self.case):
+            reasons.append(
+                f"failed diff check for {', '.join(test._failed_streams[self.case])}")
+        if self.case in test._breaches:
+            reasons.append(f'exceeded the {test._breaches[self.case]} limit')
+        if not reasons and self.config.getoption('ampl_valgrind'):
+            reasons.append('failed memory check')
+
+        raise AmplFailure('; '.join(reasons) or 'failed')
+
+    def repr_failure(self, excinfo):
+        if isinstance(excinfo.value, AmplFailure):
+            return f'{self.module} {self.case}: {excinfo.value}'
+
+        return super().repr_failure(excinfo)
+
+    def reportinfo(self):
+        return self.path, None, f'{self.module} {self.case}'
+
+
+class AmplFailure(Exception):
+    """
+    A test case failed one of its stages.
+    """
@@ -2,7 +2,18 @@
 Test Script for AMPL compiler.
 
 Usage:
-    test.py (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py (scanner | parser | hashtable | symboltable | typechecking | codegen)... [options] [<tests>...]
+    test.py watch (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py reduce (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] <test>
+    test.py fuzz (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py bench (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py ab (scanner | parser | hashtable | symboltable | typechecking | codegen) --baseline=<dir> --candidate=<dir> [options] [<tests>...]
+    test.py distill (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py regen (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py serve (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] [<tests>...]
+    test.py worker [options]
+    test.py history [runs | slowest | bytecode] (scanner | parser | hashtable | symboltable | typechecking | codegen) [options]
+    test.py history case (scanner | parser | hashtable | symboltable | typechecking | codegen) [options] <test>
     test.py (-h | --help)
     test.py --version
 
@@ -15,12 +26,57 @@ Options:
     --save=<dir>        Save test output to the specified directory
     --stream=<stream>   The stream to diff test (out, err, both) [default: both]
     --no-exec-class     Do not execute the compiled AMPL file
+    --profile           Profile the test executables with perf (or callgrind) and
+                        report their hot functions
+    --sanitize          Build the executables with AddressSanitizer and UndefinedBehaviorSanitizer,
+                        and fail tests with sanitizer findings
+    --live-diff         Compare the output while it is produced, and terminate a test
+                        executable as soon as its output diverges
+    --tier=<name>       Run only the cases of a tier created by distill, e.g. fast
+    --interval=<sec>    Polling interval of the watch mode in seconds [default: 1]
+    --jobs=<n>          Number of parallel jobs, 0 for one per CPU [default: 0]
+    --iterations=<n>    Number of mutated inputs to run when fuzzing [default: 1000]
+    --limits=<spec>     Resource limits of the test executables: CPU seconds, address
+                        space MiB, output file MiB and process count, 0 for unlimited
+                        [default: cpu=300,mem=4096,fsize=256,nproc=0]
+    --cgroup=<dir>      Run each test executable in its own cgroup v2 under <dir>
+    --tolerance=<pct>   Growth of a benchmark metric, in percent, that fails the benchmark [default: 1]
+    --against=<rev>     Compiler revision to compare benchmarks against, instead of the last one measured
+    --baseline=<dir>    Bin directory of the baseline build to compare against
+    --candidate=<dir>   Bin directory of the candidate build to compare
+    --repeat=<n>        Number of times to run each build on each test in A/B mode [default: 10]
+    --address=<host:port>
+                        Address the coordinator listens on, or the worker connects to [default: 127.0.0.1:0]
+    --local-workers=<n>
+                        Number of workers the coordinator starts on this machine [default: 0]
+    --runs=<n>          Number of most recent runs to query the history over [default: 50]
+    --limit=<n>         Number of cases to list from the history [default: 20]
+    --stage=<stage>     Stage to query the durations of (execute, execute_class, mem_check) [default: execute]
 
 Examples:
     test.py scanner 1 2 3                       # Run scanner tests 1, 2, 3
     test.py hashtable --side-by-side 0..5       # Run hashtable tests 0 through 5
+    test.py scanner parser typechecking         # Run the scanner, parser and typechecking tests in one pool
     test.py symboltable --save=results 0..10    # Run symboltable tests 0 through 10 and save the results to the results directory
     test.py all --valgrind                      # Run all tests with valgrind memory checks
+    test.py typechecking --sanitize             # Run all typechecking tests with ASan and UBSan checks
+    test.py watch parser 0..20                  # Rerun parser tests 0 through 20 whenever src/ or the tests change
+    test.py reduce typechecking 412             # Shrink typechecking test 412 to a minimal failing input
+    test.py fuzz parser --iterations=5000       # Fuzz the parser, seeded with all parser tests
+    test.py codegen --limits=cpu=60,mem=1024,fsize=64,nproc=32 --cgroup=/sys/fs/cgroup/ampl
+                                                # Run codegen tests under tighter limits in a cgroup
+    test.py bench parser 0..20 --against=main   # Compare instruction counts of parser tests with those of main
+    test.py ab codegen --baseline=../bin-main --candidate=../bin
+                                                # Compare the output and speed of two builds on the codegen tests
+    test.py distill typechecking                # Select the typechecking cases that cover as much as all of them
+    test.py typechecking --tier=fast            # Run only those cases
+    test.py regen typechecking 0..50            # Regenerate the expected output of typechecking tests 0 through 50
+    test.py serve codegen --address=0.0.0.0:7000 --local-workers=4
+                                                # Run the codegen tests on 4 local workers and any that connect
+    test.py worker --address=build1:7000        # Run the cases handed out by the coordinator on build1
+    test.py history slowest typechecking        # List the 20 slowest typechecking tests over the last 50 runs
+    test.py history case typechecking 412       # Show when typechecking test 412 started failing
+    test.py history bytecode codegen            # Show the size of the generated code over the last 50 runs
 
 There are a total of 30 tests. If no specific tests are provided, tests [0..10] will be executed by default.
 The differences will be displayed on the console.
@@ -30,12 +86,29 @@ Date: 2023-08-13
 """
 from __future__ import annotations
 
+import base64
+import hashlib
+import json
 import logging
+import math
 import os
+import random
+import resource
+import re
+import select
 import shutil
 import signal
+import socket
+import sqlite3
+import statistics
+import struct
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 from docopt import docopt
 from termcolor import colored
@@ -44,6 +117,10 @@ from pprint import pformat
 # ---------------------------------------------------------------------------- #
 # Custom formatter
 
+# The module whose cases a thread runs, which prefixes its log lines when the
+# cases of several modules share a pool of threads
+log_context = threading.local()
+
 
 class CustomFormatter(logging.Formatter):
 
@@ -57,7 +134,9 @@ class CustomFormatter(logging.Formatter):
 
     def format(self, record):
         colour = self.COLOURS.get(record.levelno, lambda s: s)
-        fmt_str = "%(message)s" if record.levelno == logging.INFO else "%(levelname)s:\t%(message)s"
+        module = getattr(log_context, 'module', '')
+        message = f'{module}: %(message)s' if module else '%(message)s'
+        fmt_str = message if record.levelno == logging.INFO else f'%(levelname)s:\t{message}'
 
         formatter = logging.Formatter(fmt_str)
         coloured_fmt = colour(formatter.format(record))
@@ -67,36 +146,142 @@ class CustomFormatter(logging.Formatter):
 # Test Classes
 
 
-def process_handler(process: subprocess.Popen, timeout: int) -> int:
+# The executables that run in a test process before its program, see
+# `limit_command`
+LAUNCHERS = {
+    os.path.realpath(path)
+    for path in (sys.executable, shutil.which('sh'), shutil.which('prlimit')) if path
+}
+
+
+def peak_memory(pid: int) -> tuple[int, int]:
+    """
+    Reads the peak resident set size and peak address space size of a process
+    that has executed its program.
+
+    :return: The peak RSS and address space in KiB, 0 if they could not be read
+    """
+
+    peaks = {'VmHWM:': 0, 'VmPeak:': 0}
+    try:
+        # Before exec the process is still a copy of this script, and then it
+        # runs the launchers of `limit_command`
+        if os.readlink(f'/proc/{pid}/exe') in LAUNCHERS:
+            return 0, 0
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                field = line.split(maxsplit=1)[0]
+                if field in peaks:
+                    peaks[field] = int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return peaks['VmHWM:'], peaks['VmPeak:']
+
+
+def wait_process(process: subprocess.Popen, timeout: float) -> int:
+    """
+    Waits for a process like `Popen.wait`, but keeps the peak RSS and address
+    space of the process in KiB in `process.peak_rss` and `process.peak_vm`.
+
+    The ru_maxrss of a forked child includes the pages of this script at the
+    time of the fork, so the peak is sampled from /proc by another thread
+    while the process runs instead. It is 0 for processes that exit before
+    they are sampled. The wait itself blocks on a pidfd, so the exit is seen
+    as soon as it happens and the durations of short runs are not rounded up.
+
+    :param process: The process to wait for
+    :param timeout: The timeout in seconds
+
+    :return: The return code of the process
+    """
+
+    peak = [0, 0]
+    done = threading.Event()
+
+    def sample():
+        delay = 0.0005
+        while not done.is_set():
+            rss, vm = peak_memory(process.pid)
+            peak[0] = max(peak[0], rss)
+            peak[1] = max(peak[1], vm)
+            done.wait(delay)
+            delay = min(delay * 2, 0.05)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except ProcessLookupError:
+            # Already reaped
+            return process.wait(timeout=0)
+        except (AttributeError, OSError):
+            pidfd = None
+
+        try:
+            if pidfd is not None:
+                # The pidfd becomes readable when the process exits
+                poller = select.poll()
+                poller.register(pidfd, select.POLLIN)
+                if not poller.poll(timeout * 1000):
+                    raise subprocess.TimeoutExpired(process.args, timeout)
+            else:
+                deadline = time.monotonic() + timeout
+                while os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+                    if time.monotonic() >= deadline:
+                        raise subprocess.TimeoutExpired(process.args, timeout)
+                    time.sleep(0.001)
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+
+        # Stop sampling before the process is reaped and its pid can be reused
+        done.set()
+        sampler.join()
+        try:
+            _, status = os.waitpid(process.pid, 0)
+        except ChildProcessError:
+            return process.wait(timeout=0)
+
+        process.returncode = os.waitstatus_to_exitcode(status)
+        process.peak_rss, process.peak_vm = peak
+        return process.returncode
+    finally:
+        done.set()
+
+
+def process_handler(process: subprocess.Popen, timeout: float, grace: float = 2) -> int:
     """
     Handles subprocess timeouts.
 
     :param process: The process to handle
     :param timeout: The timeout in seconds
+    :param grace: The time in seconds to wait for each termination signal to take effect
 
     :return: The return code of the process or -1 if the process timed out
     """
 
     try:
-        process.wait(timeout=timeout)
+        wait_process(process, timeout)
         logging.debug(f'Process returned {process.returncode}')
         return process.returncode
 
     # Timeout expired
     except subprocess.TimeoutExpired:
-        logging.warning(f'Process timed out after {timeout} seconds.')
+        logging.warning(f'Process timed out after {timeout:g} seconds.')
 
         try:
             # Terminate the whole process group
             os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-            process.wait(timeout=timeout)
+            process.wait(timeout=grace)
         except subprocess.TimeoutExpired:
             logging.warning(
                 f'Process could not be terminated using SIGTERM, attempting SIGKILL.'
             )
             try:
                 os.killpg(os.getpgid(process.pid), signal.SIGKILL)
-                process.wait(timeout=timeout)
+                process.wait(timeout=grace)
             except subprocess.TimeoutExpired:
                 logging.error(
                     f'Process could not be terminated. Manual intervention required.'
@@ -106,12 +291,717 @@ def process_handler(process: subprocess.Popen, timeout: int) -> int:
     return -1
 
 
+# Resource limit name -> (rlimit, units per limit value)
+RLIMITS = {
+    'cpu': (resource.RLIMIT_CPU, 1),                # seconds
+    'mem': (resource.RLIMIT_AS, 1024 * 1024),       # MiB
+    'fsize': (resource.RLIMIT_FSIZE, 1024 * 1024),  # MiB
+    'nproc': (resource.RLIMIT_NPROC, 1),            # processes
+}
+# The prlimit options that set the resource limits
+PRLIMIT_OPTIONS = {'cpu': 'cpu', 'mem': 'as', 'fsize': 'fsize', 'nproc': 'nproc'}
+
+
+def limit_command(limits: dict[str, int], cgroup: str = '') -> list[str]:
+    """
+    Builds the command prefix that runs a process under resource limits, and
+    in a cgroup. The limits are applied by executables rather than by Python
+    code in the forked child, which is not safe while other threads run.
+
+    :param limits: The limits to apply, see RLIMITS
+    :param cgroup: The cgroup v2 directory to move the process into
+
+    :return: The arguments to put before the command
+    """
+
+    prefix = []
+    if cgroup:
+        # The shell moves itself into the cgroup before it executes the rest
+        prefix += ['sh', '-c', 'echo 0 > "$0/cgroup.procs" && exec "$@"', cgroup]
+
+    if limits and shutil.which('prlimit'):
+        prefix.append('prlimit')
+        for name, value in limits.items():
+            rlimit, unit = RLIMITS[name]
+            _, hard = resource.getrlimit(rlimit)
+
+            # The inherited hard limit cannot be raised
+            soft = value * unit
+            if hard != resource.RLIM_INFINITY:
+                soft = min(soft, hard)
+
+            # A CPU hard limit above the soft one delivers SIGXCPU before SIGKILL
+            new_hard = soft
+            if name == 'cpu':
+                new_hard = soft + 1 if hard == resource.RLIM_INFINITY else min(soft + 1, hard)
+            prefix.append(f'--{PRLIMIT_OPTIONS[name]}={soft}:{new_hard}')
+        prefix.append('--')
+
+    return prefix
+
+
+def check_limits(limits: dict[str, int]) -> None:
+    """
+    Warns if the resource limits cannot be applied.
+    """
+
+    if limits and not shutil.which('prlimit'):
+        logging.warning('prlimit (util-linux) is not installed, resource limits are not applied')
+
+
+class LiveComparison(threading.Thread):
+
+    CHUNK = 64 * 1024
+    # Output kept after a divergence, for the diff to show
+    CONTEXT = 64 * 1024
+    # Streams that are not compared may grow to MARGIN times their expected
+    # size, plus SLACK bytes
+    MARGIN = 2
+    SLACK = 1024 * 1024
+
+    def __init__(self, pipe, out, expected_path: str, compare: bool, on_diverge) -> None:
+        """
+        Copies an output stream to a file while comparing it to the expected output.
+
+        :param pipe: The pipe the process writes the stream to
+        :param out: The file to copy the stream to
+        :param expected_path: The file with the expected output
+        :param compare: Whether to compare the stream, or only limit its size
+        :param on_diverge: Called once when the stream diverges
+        """
+
+        super().__init__(daemon=True)
+
+        try:
+            with open(expected_path, 'rb') as f:
+                self._expected = f.read()
+        except FileNotFoundError:
+            self._expected = None
+
+        self._pipe = pipe
+        self._out = out
+        self._compare = compare and self._expected is not None
+        self._on_diverge = on_diverge
+
+        # The offset of the first mismatch, or of the size limit
+        self.offset: int | None = None
+
+    def _check(self, chunk: bytes, pos: int) -> int | None:
+        """
+        :return: The offset at which the chunk diverges, if it does
+        """
+
+        if self._compare:
+            expected = self._expected[pos:pos + len(chunk)]
+            if chunk != expected:
+                return pos + len(os.path.commonprefix([chunk, expected]))
+        elif self._expected is not None:
+            size = len(self._expected) * self.MARGIN + self.SLACK
+            if pos + len(chunk) > size:
+                return size
+
+        return None
+
+    def run(self) -> None:
+        fd = self._pipe.fileno()
+        out = self._out.fileno()
+
+        pos = 0
+        while True:
+            chunk = os.read(fd, self.CHUNK)
+            if not chunk:
+                break
+
+            if self.offset is None:
+                self.offset = self._check(chunk, pos)
+                if self.offset is not None:
+                    self._on_diverge()
+                os.write(out, chunk)
+            elif pos < self.offset + self.CONTEXT:
+                os.write(out, chunk)
+
+            pos += len(chunk)
+
+        self._pipe.close()
+
+
+class TimingStore:
+
+    HISTORY = 20
+
+    def __init__(self, path: str) -> None:
+        """
+        Keeps the most recent durations of every stage of every test.
+
+        :param path: The JSON file the durations are kept in
+        """
+
+        self._path = path
+        self._lock = threading.Lock()
+        self._changed = False
+
+        try:
+            with open(path, 'r') as f:
+                self._durations: dict[str, list[float]] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._durations = {}
+
+    def record(self, key: str, duration: float) -> None:
+        """
+        Records a duration.
+
+        :param key: The module, test and stage, e.g. `parser/5/execute`
+        :param duration: The duration in seconds
+        """
+
+        with self._lock:
+            durations = self._durations.setdefault(key, [])
+            durations.append(round(duration, 4))
+            del durations[:-self.HISTORY]
+            self._changed = True
+
+    def percentile(self, key: str, q: float, min_samples: int = 3) -> float | None:
+        """
+        The q-th percentile of the recorded durations.
+
+        :return: The percentile, or None if there are fewer than `min_samples` durations
+        """
+
+        with self._lock:
+            durations = sorted(self._durations.get(key, []))
+
+        if not durations or len(durations) < min_samples:
+            return None
+
+        return durations[max(math.ceil(q * len(durations)) - 1, 0)]
+
+    def save(self) -> None:
+        """
+        Writes the durations back to the file.
+        """
+
+        with self._lock:
+            if not self._changed:
+                return
+
+            os.makedirs(os.path.dirname(self._path) or '.', exist_ok=True)
+            with open(self._path, 'w') as f:
+                json.dump(self._durations, f)
+            self._changed = False
+
+
+class Profiler:
+
+    PERF = ['perf', 'record', '-q', '-g', '-F', '999']
+    CALLGRIND = ['valgrind', '--tool=callgrind']
+    FRAME_RE = re.compile(r'^\s+[0-9a-f]+\s+(.+?)\s+\((.*)\)$')
+    CALLGRIND_RE = re.compile(
+        r'^\s*([\d,]+)\s+(?:\([\d.]+%\)\s+)?(?:.*:)?(\S+)\s+\[(.*)\]$')
+
+    def __init__(self, executable: str, temp_dir: str, out_dir: str) -> None:
+        """
+        Profiles the test executable with perf, or callgrind if perf is not
+        installed, and aggregates the profiles of all tests.
+
+        :param executable: The path of the test executable
+        :param temp_dir: The directory to write the profiles of the tests to
+        :param out_dir: The directory to write the aggregated reports to
+        """
+
+        self._executable = executable
+        self._temp_dir = temp_dir
+        self._out_dir = out_dir
+        self._tool = 'perf' if shutil.which('perf') else 'callgrind'
+
+        self._profiled: list[str] = []
+
+    def command(self, test) -> list[str]:
+        """
+        The command to run the executable under, to profile a test.
+        """
+
+        self._profiled.append(test)
+        if self._tool == 'perf':
+            return self.PERF + ['-o', f'{self._temp_dir}/{test}.perf', '--']
+
+        return self.CALLGRIND + [
+            f'--callgrind-out-file={self._temp_dir}/{test}.callgrind',
+            f'--log-file={self._temp_dir}/{test}.callgrind.log',
+        ]
+
+    def _perf_samples(self, test):
+        """
+        Reads the call stacks of a perf profile, outermost frame first.
+
+        :return: The stacks as (frames, weight) pairs
+        """
+
+        proc = subprocess.run(
+            ['perf', 'script', '-i', f'{self._temp_dir}/{test}.perf'],
+            capture_output=True, text=True, errors='replace'
+        )
+
+        frames = []
+        for line in proc.stdout.splitlines() + ['']:
+            match = self.FRAME_RE.match(line)
+            if match:
+                symbol, dso = match.groups()
+                frames.append((symbol.split('+0x')[0], dso))
+            elif not line.strip() and frames:
+                yield frames[::-1], 1
+                frames = []
+
+    def _callgrind_samples(self, test):
+        """
+        Reads the self cost of every function in a callgrind profile.
+
+        :return: Single frame stacks as (frames, weight) pairs
+        """
+
+        proc = subprocess.run(
+            ['callgrind_annotate', '--inclusive=no', '--threshold=100',
+             f'{self._temp_dir}/{test}.callgrind'],
+            capture_output=True, text=True, errors='replace'
+        )
+
+        for line in proc.stdout.splitlines():
+            match = self.CALLGRIND_RE.match(line)
+            if match:
+                cost, function, dso = match.groups()
+                yield [(function, dso)], int(cost.replace(',', ''))
+
+    def report(self, top: int = 20) -> None:
+        """
+        Writes the hot functions and collapsed stacks of all profiled tests.
+
+        Samples in library code count towards the innermost function of the
+        executable on the stack.
+
+        :param top: The number of hot functions to log
+        """
+
+        hot: dict[str, int] = {}
+        stacks: dict[str, int] = {}
+        for test in self._profiled:
+            samples = self._perf_samples(test) if self._tool == 'perf' \
+                else self._callgrind_samples(test)
+
+            for frames, weight in samples:
+                stack = ';'.join(symbol for symbol, _ in frames)
+                stacks[stack] = stacks.get(stack, 0) + weight
+
+                own = [symbol for symbol, dso in frames
+                       if os.path.basename(dso) == os.path.basename(self._executable)]
+                if own:
+                    hot[own[-1]] = hot.get(own[-1], 0) + weight
+
+        os.makedirs(self._out_dir, exist_ok=True)
+        total = sum(hot.values()) or 1
+        ranked = sorted(hot.items(), key=lambda item: item[1], reverse=True)
+
+        with open(os.path.join(self._out_dir, 'hot.txt'), 'w') as f:
+            for function, weight in ranked:
+                f.write(f'{weight / total * 100:6.2f}% {weight:>12} {function}\n')
+
+        with open(os.path.join(self._out_dir, 'stacks.folded'), 'w') as f:
+            for stack, weight in sorted(stacks.items()):
+                f.write(f'{stack} {weight}\n')
+
+        logging.info(
+            f'Hot functions over {len(self._profiled)} tests ({self._tool}):')
+        for function, weight in ranked[:top]:
+            logging.info(f'{weight / total * 100:6.2f}% {function}')
+        logging.info(f'Profile reports written to {self._out_dir}')
+
+
+class History:
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS runs (
+            id INTEGER PRIMARY KEY,
+            started TEXT NOT NULL,
+            module TEXT NOT NULL,
+            binary TEXT NOT NULL,
+            flags TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS cases (
+            run INTEGER NOT NULL REFERENCES runs (id),
+            module TEXT NOT NULL,
+            name INTEGER NOT NULL,
+            passed INTEGER NOT NULL,
+            failures TEXT NOT NULL,
+            PRIMARY KEY (module, name, run)
+        );
+        CREATE TABLE IF NOT EXISTS stages (
+            run INTEGER NOT NULL REFERENCES runs (id),
+            module TEXT NOT NULL,
+            name INTEGER NOT NULL,
+            stage TEXT NOT NULL,
+            seconds REAL NOT NULL,
+            rss_kb INTEGER NOT NULL,
+            PRIMARY KEY (module, stage, run, name)
+        );
+        CREATE TABLE IF NOT EXISTS bytecode (
+            run INTEGER NOT NULL REFERENCES runs (id),
+            module TEXT NOT NULL,
+            name INTEGER NOT NULL,
+            constants INTEGER NOT NULL,
+            methods INTEGER NOT NULL,
+            instructions INTEGER NOT NULL,
+            code_bytes INTEGER NOT NULL,
+            max_stack INTEGER NOT NULL,
+            max_locals INTEGER NOT NULL,
+            PRIMARY KEY (module, name, run)
+        );
+        CREATE INDEX IF NOT EXISTS runs_by_module ON runs (module, id);
+    """
+    # The columns of the bytecode table, see `class_metrics`
+    BYTECODE = ['constants', 'methods', 'instructions', 'code_bytes', 'max_stack', 'max_locals']
+
+    def __init__(self, path: str) -> None:
+        """
+        Keeps the results of every run in an SQLite database.
+
+        :param path: The database file
+        """
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._path = path
+        self._lock = threading.Lock()
+
+        with self.connect() as db:
+            db.executescript(self.SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path, timeout=30)
+
+    def record(self, test: BaseTest, started: str | None = None) -> int:
+        """
+        Records the results of a test run.
+
+        :param test: The test that ran
+        :param started: When the run started, defaults to now
+
+        :return: The id of the run
+        """
+
+        module = os.path.basename(test._test_dir)
+        started = started or time.strftime('%Y-%m-%d %H:%M:%S')
+        binary = file_digest(f'{test._bin_dir}/{test.EXEC}')
+
+        with self._lock, self.connect() as db:
+            run = db.execute(
+                'INSERT INTO runs (started, module, binary, flags) VALUES (?, ?, ?, ?)',
+                (started, module, binary, json.dumps(test._flags, sort_keys=True))
+            ).lastrowid
+
+            for case, passed in test._results.items():
+                failures = list(test._failed_streams.get(case, []))
+                if case in test._breaches:
+                    failures.append(f'limit:{test._breaches[case]}')
+                if test._returncodes.get(case) == -1:
+                    failures.append('timeout')
+
+                db.execute(
+                    'INSERT OR REPLACE INTO cases VALUES (?, ?, ?, ?, ?)',
+                    (run, module, case, passed, ','.join(failures)))
+
+            db.executemany(
+                'INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?, ?)',
+                [(run, module, case, stage, seconds, rss)
+                 for case, stages in test._stats.items() if case in test._results
+                 for stage, (seconds, rss) in stages.items()]
+            )
+
+            db.executemany(
+                'INSERT OR REPLACE INTO bytecode VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run, module, case, *(metrics[m] for m in self.BYTECODE))
+                 for case, metrics in test._bytecode.items() if case in test._results]
+            )
+
+        logging.debug(f'Recorded run {run} in {self._path}')
+        return run
+
+    def slowest(self, module: str, stage: str, runs: int, limit: int) -> list[tuple]:
+        """
+        The slowest cases of a module over its most recent runs.
+
+        :return: Rows of (case, mean seconds, max seconds, max RSS, samples)
+        """
+
+        with self.connect() as db:
+            return db.execute(
+                """
+                SELECT name, AVG(seconds), MAX(seconds), MAX(rss_kb), COUNT(*)
+                FROM stages
+                WHERE module = ? AND stage = ? AND run IN (
+                    SELECT id FROM runs WHERE module = ? ORDER BY id DESC LIMIT ?)
+                GROUP BY name
+                ORDER BY AVG(seconds) DESC
+                LIMIT ?
+                """,
+                (module, stage, module, runs, limit)
+            ).fetchall()
+
+    def case(self, module: str, case: int, runs: int) -> list[tuple]:
+        """
+        The results of a case over the most recent runs of its module.
+
+        :return: Rows of (run, started, binary, passed, failures, seconds), oldest first
+        """
+
+        with self.connect() as db:
+            return db.execute(
+                """
+                SELECT runs.id, runs.started, runs.binary, cases.passed,
+                       cases.failures, stages.seconds
+                FROM cases
+                JOIN runs ON runs.id = cases.run
+                LEFT JOIN stages ON stages.module = cases.module
+                    AND stages.name = cases.name AND stages.run = cases.run
+                    AND stages.stage = 'execute'
+                WHERE cases.module = ? AND cases.name = ?
+                ORDER BY runs.id DESC
+                LIMIT ?
+                """,
+                (module, case, runs)
+            ).fetchall()[::-1]
+
+    def bytecode(self, module: str, runs: int) -> list[tuple]:
+        """
+        The size of the generated code over the most recent runs of a module.
+
+        :return: Rows of (run, started, binary, cases, instructions, code bytes,
+            methods, constants, max stack, max locals, execute_class seconds),
+            with totals of instructions, code bytes, methods, constants and
+            seconds over the cases, newest first
+        """
+
+        with self.connect() as db:
+            return db.execute(
+                """
+                SELECT runs.id, runs.started, runs.binary, COUNT(bytecode.name),
+                       SUM(bytecode.instructions), SUM(bytecode.code_bytes),
+                       SUM(bytecode.methods), SUM(bytecode.constants),
+                       MAX(bytecode.max_stack), MAX(bytecode.max_locals),
+                       (SELECT SUM(stages.seconds) FROM stages
+                        WHERE stages.run = runs.id AND stages.stage = 'execute_class')
+                FROM runs
+                JOIN bytecode ON bytecode.run = runs.id
+                WHERE runs.module = ?
+                GROUP BY runs.id
+                ORDER BY runs.id DESC
+                LIMIT ?
+                """,
+                (module, runs)
+            ).fetchall()
+
+    def case_bytecode(self, module: str, case: int, runs: int) -> list[tuple]:
+        """
+        The generated code of a case over the most recent runs of its module.
+
+        :return: Rows of (run, instructions, code bytes, methods, constants,
+            max stack, max locals, execute_class seconds), oldest first
+        """
+
+        with self.connect() as db:
+            return db.execute(
+                """
+                SELECT bytecode.run, bytecode.instructions, bytecode.code_bytes,
+                       bytecode.methods, bytecode.constants, bytecode.max_stack,
+                       bytecode.max_locals, stages.seconds
+                FROM bytecode
+                LEFT JOIN stages ON stages.module = bytecode.module
+                    AND stages.name = bytecode.name AND stages.run = bytecode.run
+                    AND stages.stage = 'execute_class'
+                WHERE bytecode.module = ? AND bytecode.name = ?
+                ORDER BY bytecode.run DESC
+                LIMIT ?
+                """,
+                (module, case, runs)
+            ).fetchall()[::-1]
+
+    def runs(self, module: str, runs: int) -> list[tuple]:
+        """
+        The most recent runs of a module.
+
+        :return: Rows of (run, started, binary, passed, cases), newest first
+        """
+
+        with self.connect() as db:
+            return db.execute(
+                """
+                SELECT runs.id, runs.started, runs.binary,
+                       SUM(cases.passed), COUNT(cases.name)
+                FROM runs
+                LEFT JOIN cases ON cases.run = runs.id
+                WHERE runs.module = ?
+                GROUP BY runs.id
+                ORDER BY runs.id DESC
+                LIMIT ?
+                """,
+                (module, runs)
+            ).fetchall()
+
+
+class Sanitizer:
+
+    CC = 'gcc -fsanitize=address,undefined -fno-omit-frame-pointer -g'
+    BUILD_PRODUCTS = ['*.o', '*.a', '*.so', '*.gcno', '*.gcda']
+    # ASan and LSan summaries, and UBSan runtime errors (whose summaries repeat them)
+    FINDING_RE = re.compile(
+        r'^SUMMARY: (?!UndefinedBehaviorSanitizer)(.+)$|(\S+:\d+:\d+: runtime error: .+)$')
+    # An ASan or LSan report runs to the end of the stream, a UBSan report is
+    # a runtime error followed by its stack trace
+    REPORT_RE = re.compile(r'^(={65}|==\d+==ERROR: .*)$')
+    RUNTIME_ERROR_RE = re.compile(r'^\S+:\d+:\d+: runtime error: ')
+    FRAME_RE = re.compile(r'^\s+#\d+ ')
+
+    def __init__(self, src_dir: str, build_dir: str) -> None:
+        """
+        Runs the executable built with AddressSanitizer, LeakSanitizer and
+        UndefinedBehaviorSanitizer, and collects the findings of each test.
+
+        The executable is built in a copy of the source directory, with its
+        own bin directory next to it, so the objects and executables of the
+        normal build are never instrumented.
+
+        :param src_dir: The source directory of the normal build
+        :param build_dir: The directory to copy the sources to and build in
+        """
+
+        self._src_dir = src_dir
+        self._build_src_dir = os.path.join(build_dir, 'src')
+        self._bin_dir = os.path.join(build_dir, 'bin')
+        os.makedirs(self._bin_dir, exist_ok=True)
+
+    def attach(self, test: BaseTest) -> None:
+        """
+        Makes a test build and run the instrumented executable. The reports are
+        written to log files instead of stderr where the runtime supports it.
+        """
+
+        log = os.path.join(test._temp_dir, '{test}.sanitize')
+        test._env['ASAN_OPTIONS'] = f'log_path={log}:detect_leaks=1'
+        test._env['UBSAN_OPTIONS'] = f'log_path={log}:print_stacktrace=1'
+        test._make_args = [f'CC={self.CC}']
+        test._src_dir = self._build_src_dir
+        test._bin_dir = self._bin_dir
+
+        # AddressSanitizer reserves terabytes of shadow memory
+        test.ADDRESS_SPACE_STAGES = []
+
+    def prepare(self) -> None:
+        """
+        Brings the copy of the source directory up to date before a make.
+        Modification times are kept, so make only rebuilds what changed, and
+        the objects of the normal build are left out.
+        """
+
+        shutil.copytree(
+            self._src_dir, self._build_src_dir, dirs_exist_ok=True,
+            ignore=shutil.ignore_patterns(*self.BUILD_PRODUCTS))
+
+    def _strip(self, path: str) -> str:
+        """
+        Removes the sanitizer reports from a stderr file.
+
+        :return: The removed reports
+        """
+
+        try:
+            with open(path, 'r', errors='replace') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return ''
+
+        kept, removed = [], []
+        i = 0
+        while i < len(lines):
+            if self.REPORT_RE.match(lines[i].rstrip('\n')):
+                removed += lines[i:]
+                break
+
+            if not self.RUNTIME_ERROR_RE.match(lines[i]):
+                kept.append(lines[i])
+                i += 1
+                continue
+
+            removed.append(lines[i])
+            i += 1
+            if i < len(lines) and self.FRAME_RE.match(lines[i]):
+                while i < len(lines) and self.FRAME_RE.match(lines[i]):
+                    removed.append(lines[i])
+                    i += 1
+                if i < len(lines) and not lines[i].strip():
+                    removed.append(lines[i])
+                    i += 1
+
+        if removed:
+            with open(path, 'w') as f:
+                f.writelines(kept)
+
+        return ''.join(removed)
+
+    def findings(self, test: BaseTest, case) -> list[str]:
+        """
+        Moves the reports of a test, from the log file of each process and from
+        its stderr, into a single {test}.sanitize file, so they are not diffed.
+
+        :return: The distinct findings, in the order they were reported
+        """
+
+        logs = sorted(
+            os.path.join(test._temp_dir, f) for f in os.listdir(test._temp_dir)
+            if f.startswith(f'{case}.sanitize.'))
+
+        reports = []
+        for log in logs:
+            with open(log, 'r', errors='replace') as f:
+                reports.append(f.read())
+            os.remove(log)
+        reports.append(self._strip(f'{test._temp_dir}/{case}.err'))
+
+        with open(f'{test._temp_dir}/{case}.sanitize', 'w') as f:
+            f.writelines(reports)
+
+        findings = []
+        for line in ''.join(reports).splitlines():
+            match = self.FINDING_RE.match(line.strip())
+            finding = match and (match.group(1) or match.group(2))
+            if finding and finding not in findings:
+                findings.append(finding)
+
+        return findings
+
+
 class BaseTest:
 
     TIMEOUT = 10
+    # Timeouts are a multiple of the 95th percentile of a stage's recorded
+    # durations, within these (floor, ceiling) bounds in seconds. Stages
+    # without enough history use the ceiling.
+    TIMEOUT_MULTIPLIER = 5
+    TIMEOUT_BOUNDS = {
+        'execute': (1, 10),
+        'execute_class': (5, 30),
+        'mem_check': (10, 300),
+        'profile': (10, 300),
+        'cachegrind': (10, 300),
+        'massif': (10, 300),
+        'sanitize': (5, 60),
+    }
+    # Valgrind and the JVM reserve far more address space than they use
+    ADDRESS_SPACE_STAGES = ['execute']
+    # Fraction of the address space limit that a failed process must have
+    # reached to be reported as exceeding it, see `_limit_breach`. The peak is
+    # sampled, so it lags behind a process that allocates quickly.
+    MEM_BREACH_MARGIN = 0.5
     MAKE = 'amplc'
     EXEC = 'amplc'
     DIFF_FILES = ['out', 'err']
+    # Keeps the diffs of tests that run in parallel from interleaving
+    _print_lock = threading.Lock()
 
     def __init__(
         self,
@@ -149,24 +1039,63 @@ class BaseTest:
         self._results_dir = results_dir
 
         self._flags = flags
-
-    def make(self) -> bool:
+        self._returncodes: dict[str, int] = {}
+        # The return codes of the compiled programs (codegen), -1 on timeout
+        self._class_returncodes: dict[str, int] = {}
+
+        # Extra arguments to make, and extra environment variables for the
+        # executable in which `{test}` is replaced by the name of the test
+        self._make_args: list[str] = []
+        self._env: dict[str, str] = {}
+
+        # Without recorded durations every stage uses the fixed TIMEOUT
+        self._timings: TimingStore | None = None
+
+        # Resource limits (see RLIMITS), the cgroup v2 directory to run each
+        # process in, and the limit each test exceeded
+        self._limits: dict[str, int] = {}
+        self._cgroup = ''
+        self._breaches: dict[str, str] = {}
+
+        # Set to run the executable built with sanitizers, and their findings
+        self._sanitizer: Sanitizer | None = None
+        self._findings: dict[str, list[str]] = {}
+
+        # Set to profile the executions of the tests
+        self._profiler: Profiler | None = None
+
+        # Set to record the results in the run history
+        self._history: History | None = None
+        self._results: dict[str, bool] = {}
+        self._failed_streams: dict[str, list[str]] = {}
+        # test -> stage -> (seconds, max RSS in KiB)
+        self._stats: dict[str, dict[str, tuple[float, int]]] = {}
+        # test -> metrics of its generated class file (codegen)
+        self._bytecode: dict[str, dict[str, int]] = {}
+
+    def make(self, clean: bool = True) -> bool:
         """
         Makes the test.
 
+        :param clean: Whether to run `make clean` before compiling
+
         Returns:
             bool: True if compilation was successful, False otherwise
         """
 
-        clean_proc = subprocess.Popen(
-            ['make', 'clean'],
-            cwd=self._src_dir,
-            stdout=subprocess.DEVNULL
-        )
-        clean_proc.wait()
+        if self._sanitizer:
+            self._sanitizer.prepare()
+
+        if clean:
+            clean_proc = subprocess.Popen(
+                ['make', 'clean'],
+                cwd=self._src_dir,
+                stdout=subprocess.DEVNULL
+            )
+            clean_proc.wait()
 
         comp_proc = subprocess.Popen(
-            ['make', self.MAKE],
+            ['make', self.MAKE] + self._make_args,
             cwd=self._src_dir,
             stdout=subprocess.DEVNULL
         )
@@ -181,84 +1110,320 @@ class BaseTest:
             f'{self.MAKE.capitalize()} failed to compile with error code {comp_proc.returncode}')
         return False
 
-    def execute(self, test) -> bool:
+    def command(self, test) -> list[str]:
         """
-        Runs the test.
+        Builds the command that runs the executable on a test.
 
-        :param test: The test to execute
+        :param test: The test to run
 
-        :return: True if the test executed, False otherwise
+        :return: The command line arguments
         """
 
-        cmd_args = [
+        return [
             f'{self._bin_dir}/{self.EXEC}',
             f'{self._test_dir}/{test}.in'
         ]
 
-        temp_out = f'{self._temp_dir}/{test}.out'
-        temp_err = f'{self._temp_dir}/{test}.err'
-
-        with open(temp_out, 'w') as f_out, open(temp_err, 'w') as f_err:
+    def stdin(self, test) -> str | None:
+        """
+        The file to redirect to the standard input of the executable.
 
-            logging.debug(f'Command: {cmd_args}')
-            process = subprocess.Popen(
-                cmd_args,
-                stdout=f_out,
-                stderr=f_err,
-                cwd=self._bin_dir,
-                preexec_fn=os.setsid  # Create a new process group
-            )
+        :param test: The test to run
 
-            if process_handler(process, self.TIMEOUT) == -1:
-                logging.error(f'Execution of {test} timed out.')
-                return False
+        :return: The path of the input file, or None if nothing is redirected
+        """
 
-        return True
+        return None
 
-    def mem_check(self, test) -> bool:
+    def environment(self, test) -> dict[str, str] | None:
         """
-        Perform a memory check.
+        The environment to run the executable in.
 
-        :param test: The test to check
+        :param test: The test to run
 
-        :return: True if the memory check passed, False otherwise
+        :return: The environment, or None to inherit the environment of the script
         """
 
-        cmd_args = [
-            'valgrind',
-            '-s',
-            '--leak-check=full',
-            '--show-leak-kinds=all',
-            '--errors-for-leak-kinds=all',
-            '--error-exitcode=255',
-            f'{self._bin_dir}/{self.EXEC}',
-            f'{self._test_dir}/{test}.in'
-        ]
-
-        # Check for leaks
-        with open(f'{self._temp_dir}/{test}.valgrind', 'w') as capture:
+        if not self._env:
+            return None
 
-            logging.debug(f'Valgrind command: {cmd_args}')
-            valgrind_proc = subprocess.Popen(
-                cmd_args,
-                stdout=subprocess.DEVNULL,
-                stderr=capture,
-                cwd=self._bin_dir,
-                preexec_fn=os.setsid  # Create a new process group
-            )
-            logging.debug(f'Valgrind Process ID: {valgrind_proc.pid}')
+        env = dict(os.environ)
+        env.update({k: v.format(test=test) for k, v in self._env.items()})
+        return env
 
-            ret = process_handler(valgrind_proc, self.TIMEOUT)
-            if ret == -1 or ret == 255:
-                return False
+    def timeout(self, test, stage: str) -> float:
+        """
+        The timeout of a stage of a test, derived from its recorded durations.
 
-        return True
+        :param test: The test to run
+        :param stage: The stage to run (execute, execute_class or mem_check)
 
-    def diff(self, test) -> bool:
+        :return: The timeout in seconds
         """
-        Does a diff check on the out and err files.
 
-        :param test: The test to diff check
+        if self._timings is None:
+            return self.TIMEOUT
+
+        floor, ceiling = self.TIMEOUT_BOUNDS.get(stage, (1, self.TIMEOUT))
+        p95 = self._timings.percentile(self._timing_key(test, stage), 0.95)
+        if p95 is None:
+            return ceiling
+
+        return min(max(p95 * self.TIMEOUT_MULTIPLIER, floor), ceiling)
+
+    def _timing_key(self, test, stage: str) -> str:
+        return f'{os.path.basename(self._test_dir)}/{test}/{stage}'
+
+    def _create_cgroup(self, test, stage: str) -> str:
+        """
+        Creates a cgroup for a process, limiting its memory and process count.
+
+        :return: The cgroup directory
+        """
+
+        cgroup = os.path.join(
+            self._cgroup,
+            f'{os.path.basename(self._test_dir)}-{test}-{stage}-{threading.get_ident()}')
+        os.makedirs(cgroup, exist_ok=True)
+
+        controls = {}
+        if 'mem' in self._limits:
+            controls['memory.max'] = self._limits['mem'] * RLIMITS['mem'][1]
+            controls['memory.swap.max'] = 0
+        if 'nproc' in self._limits:
+            controls['pids.max'] = self._limits['nproc']
+
+        for control, value in controls.items():
+            with open(os.path.join(cgroup, control), 'w') as f:
+                f.write(str(value))
+
+        return cgroup
+
+    def _limit_breach(self, ret: int, cgroup: str, peak_vm: int = 0) -> str | None:
+        """
+        Determines which resource limit, if any, a process exceeded.
+
+        Without a cgroup, a process that exceeds the address space limit only
+        sees its allocations fail, so a failed process is taken to have
+        exceeded it when its peak address space came near the limit. Large
+        allocations that fail far below the limit, and exceeding the process
+        limit, are only detected with a cgroup.
+
+        :param ret: The return code of the process
+        :param cgroup: The cgroup directory of the process, if any
+        :param peak_vm: The peak address space of the process in KiB, if it
+            ran under the address space limit
+
+        :return: The name of the limit, see RLIMITS
+        """
+
+        if ret == -signal.SIGXCPU:
+            return 'cpu'
+        if ret == -signal.SIGXFSZ:
+            return 'fsize'
+        if not cgroup:
+            limit = self._limits.get('mem', 0) * RLIMITS['mem'][1] // 1024
+            if ret not in (0, -1) and peak_vm and peak_vm >= self.MEM_BREACH_MARGIN * limit:
+                return 'mem'
+            return None
+
+        for events, key, limit in (('memory.events', 'oom_kill', 'mem'),
+                                   ('pids.events', 'max', 'nproc')):
+            try:
+                with open(os.path.join(cgroup, events), 'r') as f:
+                    counters = dict(line.split() for line in f)
+            except FileNotFoundError:
+                continue
+            if int(counters.get(key, 0)):
+                return limit
+
+        return None
+
+    def run_process(
+        self,
+        test,
+        cmd_args,
+        stdout,
+        stderr,
+        stdin=None,
+        stage: str = 'execute',
+        expected: tuple[str, str] | None = None
+    ) -> int:
+        """
+        Runs a process for a test in a new process group.
+
+        :param test: The test the process belongs to
+        :param cmd_args: The command line arguments
+        :param stdout: The file (or subprocess constant) for the standard output
+        :param stderr: The file (or subprocess constant) for the standard error
+        :param stdin: The path of the file to redirect to the standard input
+        :param stage: The stage the process runs, used for its timeout
+        :param expected: The expected output files of the stage, e.g. ('out', 'err'),
+            to compare the output against while it is produced (live-diff flag)
+
+        :return: The return code of the process or -1 if the process timed out
+        """
+
+        live = bool(expected) and self._flags.get('live-diff', False)
+
+        limits = {
+            name: value for name, value in self._limits.items()
+            if name != 'mem' or stage in self.ADDRESS_SPACE_STAGES
+        }
+        if self._cgroup:
+            # The cgroup enforces the memory and process limits for every stage
+            limits.pop('mem', None)
+            limits.pop('nproc', None)
+
+        logging.debug(f'Command: {cmd_args}')
+        f_in = open(stdin, 'r') if stdin else None
+        cgroup = self._create_cgroup(test, stage) if self._cgroup else ''
+        try:
+            if stdin:
+                logging.debug(f'stdin: {stdin}')
+            process = subprocess.Popen(
+                limit_command(limits, cgroup) + cmd_args,
+                stdin=f_in,
+                stdout=subprocess.PIPE if live else stdout,
+                stderr=subprocess.PIPE if live else stderr,
+                cwd=self._bin_dir,
+                env=self.environment(test),
+                start_new_session=True
+            )
+            logging.debug(f'{test}: Process ID: {process.pid}')
+
+            comparisons = {}
+            if live:
+                def terminate():
+                    try:
+                        os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+
+                for name, pipe, out in zip(expected, (process.stdout, process.stderr), (stdout, stderr)):
+                    comparisons[name] = LiveComparison(
+                        pipe, out, f'{self._test_dir}/{test}.{name}',
+                        name in self.DIFF_FILES, terminate)
+                    comparisons[name].start()
+
+            timeout = self.timeout(test, stage)
+            logging.debug(f'{test}: {stage} timeout is {timeout:g} seconds')
+
+            start = time.monotonic()
+            ret = process_handler(process, timeout)
+            duration = time.monotonic() - start
+
+            self._stats.setdefault(test, {})[stage] = (
+                duration, getattr(process, 'peak_rss', 0))
+
+            for name, comparison in comparisons.items():
+                comparison.join()
+                if comparison.offset is not None:
+                    logging.error(
+                        f'{test}: Terminated, {name} diverged from the expected output at byte {comparison.offset}')
+            if ret != -1 and self._timings is not None:
+                self._timings.record(self._timing_key(test, stage), duration)
+
+            breach = self._limit_breach(
+                ret, cgroup, getattr(process, 'peak_vm', 0) if 'mem' in limits else 0)
+            if breach:
+                logging.error(
+                    f'{test}: {stage} exceeded the {breach} limit of {self._limits.get(breach)}')
+                self._breaches[test] = breach
+
+            return ret
+        finally:
+            if f_in:
+                f_in.close()
+            if cgroup:
+                try:
+                    os.rmdir(cgroup)
+                except OSError as e:
+                    logging.warning(f'Could not remove cgroup {cgroup}: {e}')
+
+    def execute(self, test) -> bool:
+        """
+        Runs the test.
+
+        :param test: The test to execute
+
+        :return: True if the test executed, False otherwise
+        """
+
+        temp_out = f'{self._temp_dir}/{test}.out'
+        temp_err = f'{self._temp_dir}/{test}.err'
+
+        cmd_args = self.command(test)
+        stage = 'execute'
+        if self._profiler:
+            cmd_args = self._profiler.command(test) + cmd_args
+            stage = 'profile'
+        elif self._sanitizer:
+            stage = 'sanitize'
+
+        with open(temp_out, 'w') as f_out, open(temp_err, 'w') as f_err:
+            ret = self.run_process(
+                test, cmd_args, f_out, f_err, self.stdin(test),
+                stage=stage, expected=('out', 'err'))
+
+        self._returncodes[test] = ret
+        if ret == -1:
+            logging.error(f'Execution of {test} timed out.')
+            return False
+
+        return True
+
+    def valgrind(self, test, tool_args: list[str], log: str, stage: str) -> int:
+        """
+        Runs the executable on a test under valgrind.
+
+        :param test: The test to run
+        :param tool_args: The valgrind arguments, e.g. the tool and its options
+        :param log: The file to write valgrind's messages to
+        :param stage: The stage the run belongs to, used for its timeout
+
+        :return: The return code of valgrind or -1 if it timed out
+        """
+
+        cmd_args = ['valgrind'] + tool_args + self.command(test)
+
+        with open(log, 'w') as capture:
+            return self.run_process(
+                test, cmd_args, subprocess.DEVNULL, capture, self.stdin(test),
+                stage=stage)
+
+    def mem_check(self, test) -> bool:
+        """
+        Perform a memory check.
+
+        :param test: The test to check
+
+        :return: True if the memory check passed, False otherwise
+        """
+
+        tool_args = [
+            '-s',
+            '--leak-check=full',
+            '--show-leak-kinds=all',
+            '--errors-for-leak-kinds=all',
+            '--error-exitcode=255',
+        ]
+
+        # Check for leaks
+        ret = self.valgrind(
+            test, tool_args, f'{self._temp_dir}/{test}.valgrind', 'mem_check')
+
+        if ret == -1:
+            logging.error(f'Memory check of {test} timed out.')
+            return False
+
+        return ret != 255
+
+    def diff(self, test) -> bool:
+        """
+        Does a diff check on the out and err files.
+
+        :param test: The test to diff check
 
         :return: True if both diffs passed, False otherwise
         """
@@ -281,16 +1446,21 @@ class BaseTest:
                 cmd_args = cmd_args[:1] + diff_flags + cmd_args[1:]
 
             logging.debug(f'Diff command for {output_type}: {cmd_args}')
-            diff_proc = subprocess.Popen(
+            diff_proc = subprocess.run(
                 cmd_args,
-                cwd=os.getcwd()
+                cwd=os.getcwd(),
+                stdout=subprocess.PIPE
             )
-            logging.debug(f'Diff Process ID: {diff_proc.pid}')
-            diff_proc.wait()
+
+            if diff_proc.stdout:
+                with self._print_lock:
+                    sys.stdout.buffer.write(diff_proc.stdout)
+                    sys.stdout.flush()
 
             if diff_proc.returncode != 0:
                 logging.error(
                     f'{test}: Failed diff check for {output_type}.')
+                self._failed_streams.setdefault(test, []).append(output_type)
                 passed = False
 
         return passed
@@ -328,6 +1498,49 @@ class BaseTest:
 
         return True
 
+    def run_case(self, test) -> bool:
+        """
+        Runs a single test: execution, diff check and the optional memory check.
+
+        :param test: The test to run
+
+        :return: True if the test passed, False otherwise
+        """
+
+        # A rerun (e.g. in watch mode) starts from a clean slate
+        self._results[test] = False
+        for outcomes in (self._breaches, self._failed_streams, self._findings):
+            outcomes.pop(test, None)
+
+        if not self.execute(test):
+            logging.error(f"{test}: Failed to execute")
+            return False
+
+        # The sanitizer reports have to be out of the stderr before the diff
+        findings = self._sanitizer.findings(self, test) if self._sanitizer else []
+
+        passed = self.diff(test)
+
+        if self._flags.get('memory-check', False):
+            if not self.mem_check(test):
+                logging.error(f"{test}: Failed memory check")
+                passed = False
+
+        for finding in findings:
+            logging.error(f'{test}: {finding}')
+        if findings:
+            self._findings[test] = findings
+            passed = False
+
+        if test in self._breaches:
+            passed = False
+
+        if passed:
+            logging.info(f"{test}: Passed")
+
+        self._results[test] = passed
+        return passed
+
     def test(self):
         """
         Runs the tests.
@@ -339,23 +1552,26 @@ class BaseTest:
             return
 
         logging.debug("Executing all tests")
-        failed = []
         for test in self._test_names:
-            if not self.execute(test):
-                logging.error(f"{test}: Failed to execute")
-                failed.append(test)
-                continue
+            self.run_case(test)
 
-            if not self.diff(test):
-                failed.append(test)
+        self.finish()
 
-            if self._flags.get('memory-check', False):
-                if not self.mem_check(test):
-                    logging.error(f"{test}: Failed memory check")
-                    failed.append(test) if test not in failed else None
+    def finish(self):
+        """
+        Saves and reports the results of the tests that ran, and cleans up.
+        """
+
+        failed = [test for test in self._test_names if not self._results.get(test)]
+
+        if self._timings is not None:
+            self._timings.save()
 
-            if test not in failed:
-                logging.info(f"{test}: Passed")
+        if self._profiler:
+            self._profiler.report()
+
+        if self._history:
+            self._history.record(self)
 
         perc = (1-(len(failed)/len(self._test_names))) * 100
         logging.info(f"You passed {round(perc, 2)}% of the tests")
@@ -363,6 +1579,19 @@ class BaseTest:
         if failed:
             logging.error(f"Failed tests: {failed}")
 
+        if self._breaches:
+            logging.error(f"Exceeded resource limits: {self._breaches}")
+
+        if self._findings:
+            logging.error(f"Sanitizer findings in tests: {sorted(self._findings)}")
+
+        if self._bytecode:
+            metrics = self._bytecode.values()
+            logging.info(
+                f"Generated {sum(m['instructions'] for m in metrics)} instructions "
+                f"({sum(m['code_bytes'] for m in metrics)} bytes) in "
+                f"{sum(m['methods'] for m in metrics)} methods of {len(metrics)} class files")
+
         logging.debug("Cleaning up")
         if not self.clean():
             logging.warning("Failed to cleanup")
@@ -370,260 +1599,2480 @@ class BaseTest:
 
 class RedirectionBaseTest(BaseTest):
 
+    def command(self, test) -> list[str]:
+        return [f'{self._bin_dir}/{self.EXEC}']
+
+    def stdin(self, test) -> str | None:
+        return f'{self._test_dir}/{test}.in'
+
+
+class ScannerTest(BaseTest):
+
+    MAKE = 'testscanner'
+    EXEC = 'testscanner'
+
+
+class ParserTest(BaseTest):
+
+    MAKE = 'testparser'
+    EXEC = 'amplc'
+
+
+class HashtableTest(RedirectionBaseTest):
+
+    MAKE = 'testhashtable'
+    EXEC = 'testhashtable'
+
+
+class SymboltableTest(RedirectionBaseTest):
+
+    MAKE = 'testsymboltable'
+    EXEC = 'testsymboltable'
+
+
+class TypecheckingTest(BaseTest):
+
+    MAKE = 'testtypechecking'
+    EXEC = 'amplc'
+
+    def make(self, clean: bool = True) -> bool:
+        if super().make(clean):
+            return True
+        else:
+            self.MAKE = 'amplc'
+
+        return super().make(clean)
+
+
+class CodegenTest(BaseTest):
+
+    MAKE = 'amplc'
+    EXEC = 'amplc'
+    DIFF_FILES = ['out', 'err', 'class.out', 'class.err']
+
+    def make(self, clean: bool = True) -> bool:
+
+        # Remove jasmin and class files from bin
+        for f in os.listdir(self._bin_dir):
+            if f.endswith('.jasmin') or f.endswith('.class'):
+                os.remove(os.path.join(self._bin_dir, f))
+
+        return super().make(clean)
+
     def execute(self, test) -> bool:
         """
         Runs the test.
+        """
 
-        Returns:
-            bool: True if the test executed, False otherwise
+        if not super().execute(test):
+            return True
+
+        class_file = f'{self._bin_dir}/test{test}.class'
+        if os.path.exists(class_file):
+            try:
+                self._bytecode[test] = class_metrics(class_file)
+                logging.debug(f'{test}: {self._bytecode[test]}')
+            except ValueError as e:
+                logging.warning(f'{test}: {e}')
+
+        if self._flags.get('exec-class', False):
+            return self.execute_class(test)
+
+        return True
+
+    def execute_class(self, test) -> bool:
+        """
+        Runs the class file.
         """
+        cmd_args = [
+            'java',
+            f'test{test}',
+        ]
+
+        temp_out = f'{self._temp_dir}/{test}.class.out'
+        temp_err = f'{self._temp_dir}/{test}.class.err'
+
+        logging.info("Executing compiled AMPL file")
+        with open(temp_out, 'w') as f_out, open(temp_err, 'w') as f_err:
+            ret = self.run_process(
+                test, cmd_args, f_out, f_err, f'{self._test_dir}/{test}.class.in',
+                stage='execute_class', expected=('class.out', 'class.err'))
+
+        self._class_returncodes[test] = ret
+        logging.debug(f'Process returned {ret}')
+        if ret != 0:
+            logging.error(
+                f'Unable to execute {test}.class, execution finished with error code {ret}')
+            return True
+        elif ret == -1:
+            return False
+
+        return True
+
+# ---------------------------------------------------------------------------- #
+# Class File Metrics
+
+# Sizes of the constant pool entries by tag, apart from the variable length
+# CONSTANT_Utf8 (1)
+CONSTANT_SIZES = {
+    3: 4, 4: 4, 5: 8, 6: 8, 7: 2, 8: 2, 9: 4, 10: 4, 11: 4, 12: 4,
+    15: 3, 16: 2, 17: 4, 18: 4, 19: 2, 20: 2,
+}
+
+# Operand bytes of the JVM instructions by opcode, apart from tableswitch,
+# lookupswitch and wide. Instructions not listed have no operands.
+JVM_OPERANDS = {
+    **dict.fromkeys([0x10, 0x12, *range(0x15, 0x1a), *range(0x36, 0x3b), 0xa9, 0xbc], 1),
+    **dict.fromkeys([0x11, 0x13, 0x14, 0x84, *range(0x99, 0xa9), *range(0xb2, 0xb9),
+                     0xbb, 0xbd, 0xc0, 0xc1, 0xc6, 0xc7], 2),
+    0xc5: 3,
+    **dict.fromkeys([0xb9, 0xba, 0xc8, 0xc9], 4),
+}
+
+
+def count_instructions(code: bytes) -> int:
+    """
+    Counts the instructions in the code of a method.
+    """
+
+    count = pc = 0
+    while pc < len(code):
+        opcode = code[pc]
+        if opcode in (0xaa, 0xab):
+            # tableswitch and lookupswitch operands start 4-byte aligned
+            start = pc + 1 + (3 - pc % 4)
+            if opcode == 0xaa:
+                low, high = struct.unpack_from('>ii', code, start + 4)
+                pc = start + 12 + 4 * (high - low + 1)
+            else:
+                pairs, = struct.unpack_from('>i', code, start + 4)
+                pc = start + 8 + 8 * pairs
+        elif opcode == 0xc4:
+            # wide iinc has a 2-byte constant as well as the 2-byte index
+            pc += 6 if code[pc + 1] == 0x84 else 4
+        else:
+            pc += 1 + JVM_OPERANDS.get(opcode, 0)
+        count += 1
+
+    return count
+
+
+def class_metrics(path: str) -> dict[str, int]:
+    """
+    Measures the code in a class file.
+
+    :param path: The class file
+
+    :return: The number of constants, methods, instructions and code bytes,
+        and the largest max stack and max locals of the methods
+
+    :raises ValueError: If the file is not a valid class file
+    """
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    try:
+        magic, _, _, constants = struct.unpack_from('>IHHH', data, 0)
+        if magic != 0xCAFEBABE:
+            raise ValueError(f'{path} is not a class file')
+
+        utf8: dict[int, str] = {}
+        pos = 10
+        index = 1
+        while index < constants:
+            tag = data[pos]
+            if tag == 1:
+                length, = struct.unpack_from('>H', data, pos + 1)
+                utf8[index] = data[pos + 3:pos + 3 + length].decode('utf-8', 'replace')
+                pos += 3 + length
+            else:
+                pos += 1 + CONSTANT_SIZES[tag]
+            # Longs and doubles take two entries
+            index += 2 if tag in (5, 6) else 1
+
+        # Access flags, this and super class, and interfaces
+        interfaces, = struct.unpack_from('>H', data, pos + 6)
+        pos += 8 + 2 * interfaces
+
+        metrics = dict.fromkeys(History.BYTECODE, 0)
+        metrics['constants'] = constants - 1
+        for member in ('fields', 'methods'):
+            count, = struct.unpack_from('>H', data, pos)
+            pos += 2
+            if member == 'methods':
+                metrics['methods'] = count
+
+            for _ in range(count):
+                attributes, = struct.unpack_from('>H', data, pos + 6)
+                pos += 8
+                for _ in range(attributes):
+                    name, length = struct.unpack_from('>HI', data, pos)
+                    if member == 'methods' and utf8.get(name) == 'Code':
+                        max_stack, max_locals, code_length = struct.unpack_from(
+                            '>HHI', data, pos + 6)
+                        code = data[pos + 14:pos + 14 + code_length]
+                        metrics['max_stack'] = max(metrics['max_stack'], max_stack)
+                        metrics['max_locals'] = max(metrics['max_locals'], max_locals)
+                        metrics['code_bytes'] += code_length
+                        metrics['instructions'] += count_instructions(code)
+                    pos += 6 + length
+    except (struct.error, IndexError, KeyError) as e:
+        raise ValueError(f'{path} is not a valid class file: {e!r}') from e
+
+    return metrics
+
+# ---------------------------------------------------------------------------- #
+# Test Runner
+
+# Persistent output of the test script, kept across runs
+ARTIFACTS_DIR = 'artifacts'
+
+TESTS = {
+    'scanner': ScannerTest,
+    'parser': ParserTest,
+    'hashtable': HashtableTest,
+    'symboltable': SymboltableTest,
+    'typechecking': TypecheckingTest,
+    'codegen': CodegenTest
+}
+
+
+def create_test(
+    executable: str,
+    test_cases,
+    flags,
+    cwd: str = os.getcwd(),
+    src_dir: str = '../src',
+    bin_dir: str = '../bin',
+    result_dir: str = '',
+    stream: str = 'both',
+    limits: dict[str, int] | None = None,
+    cgroup: str = '',
+    temp_dir: str = 'temp',
+    tier: str = ''
+) -> BaseTest:
+    """
+    Creates a new test.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to run
+    :param perform_mem_check: Whether to perform a memory check on the executable
+    :param side_by_side: Whether to display the diff side by side
+    :param src_dir: The source directory
+    :param bin_dir: The binary directory
+    :param tests_dir: The tests directory
+    :param result_dir: The directory to save to
+    :param limits: The resource limits of the executables, see RLIMITS
+    :param cgroup: The cgroup v2 directory to run the executables under
+    :param temp_dir: The temp directory, relative to cwd
+    :param tier: The tier (see `distill`) to select the test cases from
+    """
+
+    if executable not in TESTS:
+        logging.error(f'Invalid executable {executable}')
+        sys.exit(1)
+
+    diff_stream = []
+    diff_stream.append('out') if stream in ['out', 'both'] else None
+    diff_stream.append('err') if stream in ['err', 'both'] else None
+    if flags.get('exec-class', False) and executable == 'codegen':
+        diff_stream.append('class.out') if stream in [
+            'out', 'both', 'class'] else None
+        diff_stream.append('class.err') if stream in [
+            'err', 'both', 'class'] else None
+
+    if tier:
+        manifest = os.path.join(cwd, ARTIFACTS_DIR, 'tiers', f'{executable}.{tier}')
+        try:
+            cases = read_tier(manifest)
+        except FileNotFoundError:
+            logging.error(
+                f'There is no {tier} tier of {executable}, create it with `test.py distill {executable}`')
+            sys.exit(1)
+        test_cases = [c for c in cases if not test_cases or c in test_cases]
+        if not test_cases:
+            logging.error(f'None of the test cases are in the {tier} tier of {executable}')
+            sys.exit(1)
+    elif len(test_cases) == 0:
+        # count all the .in file in the module directory
+        in_files = filter(lambda f: f.endswith(
+            '.in') and "class" not in f, os.listdir(executable)
+        )
+        test_cases = list(map(lambda f: int(f.split('.')[0]), in_files))
+        test_cases.sort()
+
+    logging.debug(f'Test cases\n{pformat(test_cases, compact=True)}')
+
+    # Create the test
+    test = TESTS[executable](
+        test_cases,
+        os.path.join(cwd, src_dir),
+        os.path.join(cwd, bin_dir),
+        os.path.join(cwd, executable),
+        os.path.join(cwd, temp_dir),
+        result_dir,
+        flags
+    )
+    test.DIFF_FILES = diff_stream
+    test._timings = TimingStore(os.path.join(cwd, ARTIFACTS_DIR, 'timings.json'))
+    test._limits = limits or {}
+    test._cgroup = cgroup
+    test._history = History(os.path.join(cwd, ARTIFACTS_DIR, 'history.db'))
+
+    if flags.get('sanitize', False):
+        test._sanitizer = Sanitizer(
+            test._src_dir, os.path.join(cwd, ARTIFACTS_DIR, 'sanitize'))
+        test._sanitizer.attach(test)
+
+    if flags.get('profile', False):
+        if not shutil.which('perf') and not shutil.which('valgrind'):
+            logging.error('Profiling requires perf or valgrind.')
+            sys.exit(1)
+
+        test._profiler = Profiler(
+            f'{test._bin_dir}/{test.EXEC}',
+            test._temp_dir,
+            os.path.join(cwd, ARTIFACTS_DIR, 'profile', executable)
+        )
+
+    return test
+
+
+def test_runner(executable: str, test_cases, flags, **kwargs):
+    """
+    Creates and runs a new test.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to run
+    :param flags: The flags to pass to the test
+    :param kwargs: Passed on to `create_test`
+    """
+
+    test = create_test(executable, test_cases, flags, **kwargs)
+
+    # Run the test
+    logging.debug(f'Running {executable} tests...')
+    test.test()
+
+# ---------------------------------------------------------------------------- #
+# Multi-module Scheduling
+
+
+class Scheduler:
+
+    def __init__(self, tests: list[BaseTest], bin_dir: str, jobs: int) -> None:
+        """
+        Runs the tests of several modules as one graph: every make target is
+        made once, and then the cases of all modules share one pool of workers.
+
+        :param tests: The tests of the modules
+        :param bin_dir: The directory to keep the executable of each target in
+        :param jobs: The number of cases to run in parallel
+        """
+
+        self._tests = tests
+        self._bin_dir = bin_dir
+        self._jobs = jobs
+
+    def make(self) -> list[BaseTest]:
+        """
+        Cleans and makes each distinct target once. Several targets build the
+        same executable with different objects, so each target is made from
+        clean, and its executable is copied to its own bin directory, which
+        its tests then run in.
+
+        :return: The tests whose executable was made
+        """
+
+        targets: dict[str, list[BaseTest]] = {}
+        for test in self._tests:
+            targets.setdefault(test.MAKE, []).append(test)
+
+        made = []
+        for target, tests in targets.items():
+            try:
+                built = tests[0].make(clean=True)
+            except (OSError, subprocess.SubprocessError) as e:
+                logging.error(f'Failed to make {target}: {e}')
+                built = False
+
+            if not built:
+                logging.error(
+                    f'Failed to make {target}, skipping the {", ".join(os.path.basename(t._test_dir) for t in tests)} tests')
+                continue
+
+            bin_dir = os.path.join(self._bin_dir, target)
+            os.makedirs(bin_dir, exist_ok=True)
+            for test in tests:
+                shutil.copy2(f'{test._bin_dir}/{test.EXEC}', bin_dir)
+                test._bin_dir = bin_dir
+                if test._profiler:
+                    test._profiler._executable = f'{bin_dir}/{test.EXEC}'
+
+            made += tests
+
+        return made
+
+    def _estimate(self, test: BaseTest, case) -> float:
+        """
+        The expected duration of a case from its recorded durations, infinite
+        for cases that have not run before.
+        """
+
+        if test._timings is None:
+            return math.inf
+
+        durations = [
+            test._timings.percentile(test._timing_key(case, stage), 0.95)
+            for stage in test.TIMEOUT_BOUNDS
+        ]
+        if durations[0] is None:
+            return math.inf
+
+        return sum(d for d in durations if d is not None)
+
+    @staticmethod
+    def _run_case(test: BaseTest, case) -> bool:
+        """
+        Runs a case, prefixing the log lines with its module.
+        """
+
+        log_context.module = os.path.basename(test._test_dir)
+        try:
+            return test.run_case(case)
+        finally:
+            log_context.module = ''
+
+    def run(self) -> bool:
+        """
+        Makes the executables and runs the cases of all modules, longest first
+        so the pool is not left waiting on a slow case at the end.
+
+        :return: True if every case of every module passed, False otherwise
+        """
+
+        made = self.make()
+
+        cases = [(test, case) for test in made for case in test._test_names]
+        cases.sort(key=lambda c: self._estimate(*c), reverse=True)
+        logging.info(
+            f'Running {len(cases)} cases of {len(made)} modules with {self._jobs} jobs')
+
+        try:
+            with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+                results = list(pool.map(lambda c: self._run_case(*c), cases))
+
+            for test in made:
+                logging.info(f'{os.path.basename(test._test_dir)} results:')
+                test.finish()
+        finally:
+            shutil.rmtree(self._bin_dir, ignore_errors=True)
+
+        return len(made) == len(self._tests) and all(results)
+
+
+def scheduler_runner(
+    executables: list[str],
+    test_cases,
+    flags,
+    jobs: int,
+    result_dir: str = '',
+    cwd: str = os.getcwd(),
+    **kwargs
+):
+    """
+    Creates and runs the tests of several modules together.
+
+    :param executables: The names of the executables to test
+    :param test_cases: The test cases to run of every module
+    :param flags: The flags to pass to the tests
+    :param jobs: The number of cases to run in parallel
+    :param result_dir: The directory to save to, with a subdirectory per module
+    :param kwargs: Passed on to `create_test`
+    """
+
+    tests = []
+    for executable in executables:
+        test = create_test(
+            executable,
+            test_cases,
+            flags,
+            cwd=cwd,
+            result_dir=os.path.join(result_dir, executable) if result_dir else '',
+            temp_dir=os.path.join('temp', executable),
+            **kwargs
+        )
+        os.makedirs(test._temp_dir, exist_ok=True)
+        tests.append(test)
+
+    if result_dir:
+        os.makedirs(result_dir, exist_ok=True)
+
+    # The tests share one store, so that saving one does not drop the
+    # durations recorded by the others
+    timings = tests[0]._timings
+    for test in tests:
+        test._timings = timings
+
+    Scheduler(tests, os.path.join(cwd, 'temp', 'bin'), jobs).run()
+
+# ---------------------------------------------------------------------------- #
+# Distributed Execution
+
+
+def parse_address(address: str) -> tuple[str, int]:
+    """
+    Parses a host:port address.
+    """
+
+    host, _, port = address.rpartition(':')
+    if not host or not port.isdigit():
+        logging.error(f'Invalid address {address}, expected host:port')
+        sys.exit(1)
+
+    return host, int(port)
+
+
+class Channel:
+
+    def __init__(self, sock: socket.socket) -> None:
+        """
+        Sends and receives messages as newline delimited JSON objects.
+
+        :param sock: The connected socket
+        """
+
+        self._rfile = sock.makefile('r', encoding='utf-8')
+        self._wfile = sock.makefile('w', encoding='utf-8')
+
+    def send(self, **message) -> None:
+        self._wfile.write(json.dumps(message) + '\n')
+        self._wfile.flush()
+
+    def receive(self) -> dict | None:
+        """
+        :return: The next message, or None if the connection was closed
+        """
+
+        try:
+            line = self._rfile.readline()
+        except OSError:
+            return None
+
+        return json.loads(line) if line else None
+
+
+class Coordinator:
+
+    # Number of times a case is handed out again after its worker died
+    RETRIES = 2
+
+    # Seconds without connected workers after which to warn
+    IDLE_WARNING = 30
+
+    # Idle seconds, probe interval and failed probes after which the
+    # connection of a worker whose machine vanished is dropped
+    KEEPALIVE = (60, 10, 3)
+
+    def __init__(self, test: BaseTest, address: str) -> None:
+        """
+        Hands out the cases of a test on demand to workers that connect over
+        TCP, so fast workers take over the cases slow ones have not started.
+        Cases of workers that die are handed out again.
+
+        :param test: The test whose cases to run, which collects the results
+        :param address: The host:port address to listen on
+        """
+
+        self._test = test
+        self._address = parse_address(address)
+
+        self._pending = list(test._test_names)
+        self._remaining = set(test._test_names)
+        self._attempts: dict[str, int] = {}
+        self._workers = 0
+        self._condition = threading.Condition()
+
+    def _next(self):
+        """
+        Waits for a case to hand out.
+
+        :return: The case, or None once all cases are done
+        """
+
+        with self._condition:
+            while not self._pending and self._remaining:
+                self._condition.wait()
+
+            return self._pending.pop(0) if self._pending else None
+
+    def _lost(self, case, worker: str) -> None:
+        """
+        Hands out the case of a dead worker again, up to RETRIES times.
+        """
+
+        with self._condition:
+            self._attempts[case] = self._attempts.get(case, 0) + 1
+            if self._attempts[case] <= self.RETRIES:
+                logging.warning(f'{case}: Lost with worker {worker}, retrying')
+                self._pending.insert(0, case)
+            else:
+                logging.error(f'{case}: Lost with {self._attempts[case]} workers, giving up')
+                self._test._results[case] = False
+                self._remaining.discard(case)
+            self._condition.notify_all()
+
+    def _abandon(self, reason: str) -> None:
+        """
+        Fails all cases that are not done yet.
+        """
+
+        with self._condition:
+            if self._remaining:
+                logging.error(f'{len(self._remaining)} cases not run, {reason}')
+            for case in self._remaining:
+                self._test._results[case] = False
+            self._pending.clear()
+            self._remaining.clear()
+            self._condition.notify_all()
+
+    def _complete(self, case, result: dict) -> None:
+        """
+        Records the result of a case, and writes its output files to the temp
+        directory to show the diffs of failed cases. Output files must be
+        named after the case, and are never written outside the temp
+        directory.
+        """
+
+        test = self._test
+        for name, content in result['artifacts'].items():
+            if os.path.basename(name) != name or not name.startswith(f'{case}.'):
+                logging.warning(f'{case}: Ignoring output file {name!r} of {result["worker"]}')
+                continue
+            with open(os.path.join(test._temp_dir, name), 'wb') as f:
+                f.write(base64.b64decode(content))
+
+        test._returncodes[case] = result['returncode']
+        test._stats[case] = {
+            stage: tuple(stats) for stage, stats in result['stats'].items()}
+        if test._timings is not None and result['returncode'] != -1:
+            for stage, (seconds, _) in test._stats[case].items():
+                test._timings.record(test._timing_key(case, stage), seconds)
+
+        if result['bytecode']:
+            test._bytecode[case] = result['bytecode']
+        if result['breach']:
+            test._breaches[case] = result['breach']
+        if result['findings']:
+            test._findings[case] = result['findings']
+            for finding in result['findings']:
+                logging.error(f'{case}: {finding}')
+
+        if result['passed']:
+            logging.info(f'{case}: Passed on {result["worker"]}')
+        else:
+            if result['returncode'] == -1:
+                logging.error(f'Execution of {case} timed out.')
+            test.diff(case)
+            logging.error(f'{case}: Failed on {result["worker"]}')
+
+        with self._condition:
+            test._results[case] = result['passed']
+            self._remaining.discard(case)
+            self._condition.notify_all()
+
+    def handle(self, sock: socket.socket) -> None:
+        """
+        Serves a worker until all cases are done or the worker disconnects.
+        Workers that vanish without closing their connection, e.g. when their
+        machine goes down, are detected by TCP keepalive probes.
+        """
+
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, 'TCP_KEEPIDLE'):
+            idle, interval, count = self.KEEPALIVE
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+
+        channel = Channel(sock)
+        hello = channel.receive()
+        if not hello:
+            return
+
+        worker = f'{hello["host"]}:{hello["pid"]}'
+        logging.info(f'Worker {worker} connected')
+        with self._condition:
+            self._workers += 1
+
+        test = self._test
+        channel.send(
+            type='setup',
+            module=os.path.basename(test._test_dir),
+            flags=test._flags,
+            stream=test.DIFF_FILES,
+            limits=test._limits,
+            host=socket.gethostname(),
+            cwd=os.path.realpath(os.getcwd())
+        )
+
+        case = None
+        try:
+            while True:
+                message = channel.receive()
+                if message is None:
+                    break
+                if message['type'] == 'error':
+                    logging.error(f'Worker {worker}: {message["message"]}')
+                    break
+                if message['type'] == 'result':
+                    self._complete(case, message)
+                    case = None
+
+                case = self._next()
+                if case is None:
+                    channel.send(type='done')
+                    break
+                channel.send(type='case', case=case)
+        except (OSError, ValueError) as e:
+            logging.warning(f'Worker {worker}: {e}')
+        finally:
+            if case is not None:
+                self._lost(case, worker)
+            with self._condition:
+                self._workers -= 1
+                self._condition.notify_all()
+            logging.debug(f'Worker {worker} disconnected')
+
+    def run(self, local_workers: int = 0, worker_args: list[str] = []) -> None:
+        """
+        Serves workers until all cases are done.
+
+        :param local_workers: The number of workers to start on this machine
+        :param worker_args: Extra command line arguments of the local workers
+        """
+
+        server = socket.create_server(self._address)
+        host, port = server.getsockname()[:2]
+        logging.info(f'Waiting for workers on {host}:{port}')
+
+        def accept():
+            while True:
+                try:
+                    sock, _ = server.accept()
+                except OSError:
+                    return
+                threading.Thread(target=self.handle, args=(sock,), daemon=True).start()
+
+        threading.Thread(target=accept, daemon=True).start()
+
+        log_dir = os.path.join(ARTIFACTS_DIR, 'workers')
+        os.makedirs(log_dir, exist_ok=True)
+        connect = '127.0.0.1' if host in ('0.0.0.0', '') else host
+        workers = []
+        for i in range(local_workers):
+            with open(os.path.join(log_dir, f'{i}.log'), 'w') as log:
+                workers.append(subprocess.Popen(
+                    [sys.executable, os.path.abspath(__file__), 'worker',
+                     f'--address={connect}:{port}'] + worker_args,
+                    stdout=log,
+                    stderr=subprocess.STDOUT
+                ))
+
+        # Local workers that all exit, e.g. because they fail to build, leave
+        # no one to run the remaining cases
+        idle = time.monotonic()
+        with self._condition:
+            while self._remaining:
+                self._condition.wait(1)
+                if self._workers:
+                    idle = time.monotonic()
+                elif workers and all(worker.poll() is not None for worker in workers):
+                    logging.error(f'All local workers exited, see {log_dir}')
+                    break
+                elif time.monotonic() - idle >= self.IDLE_WARNING:
+                    logging.warning(f'No workers connected, {len(self._remaining)} cases remaining')
+                    idle = time.monotonic()
+
+        self._abandon('no workers left')
+        server.close()
+        for worker in workers:
+            try:
+                worker.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+
+
+def serve_runner(
+    executable: str,
+    test_cases,
+    flags,
+    address: str,
+    local_workers: int = 0,
+    worker_args: list[str] = [],
+    **kwargs
+):
+    """
+    Runs the cases of a test on workers, and collects the results.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to run
+    :param flags: The flags to pass to the test
+    :param address: The host:port address to listen on
+    :param local_workers: The number of workers to start on this machine
+    :param worker_args: Extra command line arguments of the local workers
+    :param kwargs: Passed on to `create_test`
+    """
+
+    # Workers profile on their own machine, which cannot be reported here
+    test = create_test(executable, test_cases, dict(flags, profile=False), **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+
+    # Workers that share this directory use this executable
+    if not test.make():
+        logging.error('Failed to Make Tester')
+        sys.exit(1)
+
+    Coordinator(test, address).run(local_workers, worker_args)
+    test.finish()
+
+
+def worker_runner(address: str, cgroup: str = ''):
+    """
+    Runs the cases a coordinator hands out until it is done.
+
+    :param address: The host:port address of the coordinator
+    :param cgroup: The cgroup v2 directory to run the executables under
+    """
+
+    with socket.create_connection(parse_address(address)) as sock:
+        channel = Channel(sock)
+        channel.send(type='hello', host=socket.gethostname(), pid=os.getpid())
+
+        setup = channel.receive()
+        if not setup:
+            logging.error('The coordinator closed the connection.')
+            return
+
+        check_limits(setup['limits'])
+        test = create_test(
+            setup['module'],
+            [],
+            setup['flags'],
+            limits=setup['limits'],
+            cgroup=cgroup,
+            temp_dir=os.path.join('temp', f'worker-{os.getpid()}')
+        )
+        test.DIFF_FILES = setup['stream']
+        os.makedirs(test._temp_dir, exist_ok=True)
+
+        try:
+            same_tree = setup['host'] == socket.gethostname() \
+                and setup['cwd'] == os.path.realpath(os.getcwd())
+            if not same_tree and not test.make():
+                channel.send(type='error', message='Failed to Make Tester')
+                return
+
+            channel.send(type='ready')
+            while True:
+                message = channel.receive()
+                if not message or message['type'] == 'done':
+                    break
+
+                case = message['case']
+                passed = test.run_case(case)
+
+                artifacts = {}
+                for name in os.listdir(test._temp_dir):
+                    if name.startswith(f'{case}.'):
+                        path = os.path.join(test._temp_dir, name)
+                        with open(path, 'rb') as f:
+                            artifacts[name] = base64.b64encode(f.read()).decode()
+                        os.remove(path)
+
+                channel.send(
+                    type='result',
+                    worker=f'{socket.gethostname()}:{os.getpid()}',
+                    passed=passed,
+                    returncode=test._returncodes.get(case, -1),
+                    stats=test._stats.get(case, {}),
+                    breach=test._breaches.get(case),
+                    findings=test._findings.get(case, []),
+                    bytecode=test._bytecode.get(case),
+                    artifacts=artifacts
+                )
+        finally:
+            test.clean()
+
+# ---------------------------------------------------------------------------- #
+# Watch Mode
+
+
+def file_digest(path: str) -> str:
+    """
+    Hashes the contents of a file.
+
+    :param path: The file to hash
+
+    :return: The hex digest of the file, or an empty string if it does not exist
+    """
+
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except FileNotFoundError:
+        return ''
+
+
+class Watcher:
+
+    SRC_SUFFIXES = ('.c', '.h', 'Makefile')
+    STYLE_CHECKER = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'style_checker.py')
+
+    def __init__(self, test: BaseTest, interval: float = 1) -> None:
+        """
+        Watches the source and test directories of a test and reruns it on change.
+
+        :param test: The test to watch
+        :param interval: The polling interval in seconds
+        """
+
+        self._test = test
+        self._interval = interval
+
+        self._mtimes: dict[str, int] = {}
+        self._binary = ''
+        self._built = False
+        self._style_errors: dict[str, bool] = {}
+
+        # case -> (binary digest, case file digests, passed)
+        self._results: dict[str, tuple[str, tuple[str, ...], bool]] = {}
+
+    def _case_files(self, test) -> list[str]:
+        """
+        Lists the files in the test directory that belong to a case.
+        """
+
+        prefix = f'{test}.'
+        return sorted(
+            os.path.join(self._test._test_dir, f)
+            for f in os.listdir(self._test._test_dir) if f.startswith(prefix)
+        )
+
+    def _poll(self) -> list[str]:
+        """
+        Polls the watched files for modifications.
+
+        :return: The paths that were added, modified or removed since the last poll
+        """
+
+        mtimes = {}
+        for root, _, files in os.walk(self._test._src_dir):
+            for f in files:
+                if f.endswith(self.SRC_SUFFIXES):
+                    path = os.path.join(root, f)
+                    mtimes[path] = os.stat(path).st_mtime_ns
+
+        for test in self._test._test_names:
+            for path in self._case_files(test):
+                mtimes[path] = os.stat(path).st_mtime_ns
+
+        changed = [
+            path for path in mtimes.keys() | self._mtimes.keys()
+            if mtimes.get(path) != self._mtimes.get(path)
+        ]
+        self._mtimes = mtimes
+        return sorted(changed)
+
+    def _style_check(self, files: list[str]) -> None:
+        """
+        Runs the style checker on the changed C files.
+        """
+
+        c_files = [f for f in files if f.endswith('.c') and os.path.exists(f)]
+        for f in set(self._style_errors) - set(self._mtimes):
+            del self._style_errors[f]
+        if not c_files:
+            return
+
+        logging.info(f'Style checking {len(c_files)} file(s)')
+        for f in c_files:
+            proc = subprocess.run(
+                [sys.executable, self.STYLE_CHECKER, 'check', f])
+            self._style_errors[f] = proc.returncode != 0
+
+    def _rebuild(self) -> None:
+        """
+        Incrementally rebuilds the executable.
+        """
+
+        self._built = self._test.make(clean=False)
+        if self._built:
+            self._binary = file_digest(
+                f'{self._test._bin_dir}/{self._test.EXEC}')
+
+    def _run(self) -> None:
+        """
+        Reruns every case whose executable or case files changed.
+        """
+
+        for test in self._test._test_names:
+            key = tuple(file_digest(f) for f in self._case_files(test))
+            cached = self._results.get(test)
+            if cached and cached[:2] == (self._binary, key):
+                continue
+
+            passed = self._test.run_case(test)
+            self._results[test] = (self._binary, key, passed)
+
+    def _table(self, width: int = 10) -> str:
+        """
+        Renders the pass/fail table.
+        """
+
+        cells = []
+        for test in self._test._test_names:
+            if test not in self._results:
+                cells.append(colored(f'{test:>5} ?', 'yellow'))
+            elif self._results[test][2]:
+                cells.append(colored(f'{test:>5} \u2714', 'green'))
+            else:
+                cells.append(colored(f'{test:>5} \u2718', 'red'))
+
+        rows = [' '.join(cells[i:i + width])
+                for i in range(0, len(cells), width)]
+
+        passed = sum(1 for r in self._results.values() if r[2])
+        failed = [f for f, err in self._style_errors.items() if err]
+        rows.append(
+            f'{passed}/{len(self._test._test_names)} passed, build '
+            + (colored('ok', 'green') if self._built else colored('failed', 'red'))
+            + ', style '
+            + (colored(f'errors in {len(failed)} file(s)', 'red')
+               if failed else colored('ok', 'green'))
+        )
+        return '\n'.join(rows)
+
+    def watch(self) -> None:
+        """
+        Watches until interrupted.
+        """
+
+        logging.info(
+            f'Watching {self._test._src_dir} and {self._test._test_dir} (Ctrl+C to stop)')
+
+        try:
+            while True:
+                changed = self._poll()
+                if not changed:
+                    time.sleep(self._interval)
+                    continue
+
+                logging.debug(f'Changed files\n{pformat(changed)}')
+                if not self._built or any(f.startswith(self._test._src_dir) for f in changed):
+                    self._style_check(changed)
+                    self._rebuild()
+
+                if self._built:
+                    self._run()
+                    if self._test._timings is not None:
+                        self._test._timings.save()
+
+                print(self._table(), flush=True)
+        finally:
+            self._test.clean()
+
+
+def watch_runner(executable: str, test_cases, flags, interval: float = 1, **kwargs):
+    """
+    Creates a test and reruns it whenever its sources or cases change.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to run
+    :param flags: The flags to pass to the test
+    :param interval: The polling interval in seconds
+    :param kwargs: Passed on to `create_test`
+    """
+
+    test = create_test(executable, test_cases, flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+    Watcher(test, interval).watch()
+
+# ---------------------------------------------------------------------------- #
+# Test Case Reduction
+
+
+def output_lines(path: str, input_path: str) -> list[str]:
+    """
+    Reads an output file with the input and its locations masked, as in
+    `<input>:L:C: error: ...`, so that the lines survive the input shrinking.
+
+    :param path: The output file
+    :param input_path: The path of the input file the output was produced from
+
+    :return: The lines of the output, none if the file does not exist
+    """
+
+    try:
+        with open(path, 'r', errors='replace') as f:
+            text = f.read()
+    except FileNotFoundError:
+        return []
+
+    text = text.replace(input_path, '<input>')
+    text = text.replace(os.path.basename(input_path), '<input>')
+    return re.sub(r'<input>:\d+:\d+', '<input>:L:C', text).splitlines()
+
+
+def error_message(lines: list[str]) -> str:
+    """
+    The message that characterises the (masked) stderr of a run: its first line,
+    or the summary line of a sanitizer report.
+    """
+
+    lines = [line.strip() for line in lines if line.strip()]
+    summaries = [line for line in lines if line.startswith('SUMMARY:')]
+    message = (summaries or lines or [''])[0]
+    message = re.sub(r'0x[0-9a-fA-F]+', 'ADDR', message)
+    return re.sub(r'==\d+==', '==N==', message)
+
+
+def failure_signature(test: BaseTest, case, input_path: str) -> tuple:
+    """
+    Summarises how an executed case failed, independently of its input.
+
+    The path of the input and the locations in it are masked so that the
+    signature survives the input shrinking. Other numbers, e.g. of arguments,
+    are kept.
+
+    :param test: The test that executed the case
+    :param case: The executed case
+    :param input_path: The path of the input file the case was run on
+
+    :return: The failure signature
+    """
+
+    ret = test._returncodes.get(case, -1)
+    if ret == -1:
+        return ('timeout',)
+
+    message = error_message(output_lines(f'{test._temp_dir}/{case}.err', input_path))
+    if ret < 0:
+        return ('signal', -ret, message)
+
+    return ('exit', ret, message)
+
+
+def wrong_output(test: BaseTest, case, input_path: str) -> list[tuple[str, str]]:
+    """
+    The lines of the output and error streams that a failed case produced but
+    its expected output does not have, masked like `output_lines`.
+
+    :return: The wrong lines as (stream, line)
+    """
+
+    wrong = []
+    for stream in test._failed_streams.get(case, []):
+        if stream not in ('out', 'err'):
+            continue
+
+        extra = (Counter(output_lines(f'{test._temp_dir}/{case}.{stream}', input_path))
+                 - Counter(output_lines(f'{test._test_dir}/{case}.{stream}', input_path)))
+        wrong += [(stream, line) for line in sorted(extra.elements())]
+
+    return wrong
+
+
+class Reducer:
+
+    def __init__(self, test: BaseTest, work_dir: str, jobs: int) -> None:
+        """
+        Minimises a failing input by delta debugging.
+
+        :param test: A test of the module, used to make and run the executable
+        :param work_dir: The directory in which candidate inputs are run
+        :param jobs: The number of candidates to run in parallel
+        """
+
+        os.makedirs(work_dir, exist_ok=True)
+
+        self._work_dir = work_dir
+        self._jobs = jobs
+        self._signature: tuple = ()
+        self._wrong: list[tuple[str, str]] = []
+
+        # Candidates are run as cases named after their content hash
+        flags = dict(test._flags, **{'exec-class': False})
+        self._runner = type(test)(
+            [], test._src_dir, test._bin_dir, work_dir, work_dir, '', flags)
+        self._runner._limits = test._limits
+        self._runner._cgroup = test._cgroup
+        self._runner.ADDRESS_SPACE_STAGES = test.ADDRESS_SPACE_STAGES
+
+        # content hash -> whether the candidate reproduced the failure
+        self._cache: dict[str, bool] = {}
+
+    def _reproduces(self, content: str) -> bool:
+        """
+        Runs a candidate input and checks that it fails the same way: with the
+        failure signature, or else by producing the same wrong lines.
+        """
+
+        digest = hashlib.sha1(content.encode()).hexdigest()
+        if digest in self._cache:
+            return self._cache[digest]
+
+        path = f'{self._work_dir}/{digest}.in'
+        with open(path, 'w') as f:
+            f.write(content)
+
+        self._runner.execute(digest)
+        if self._wrong:
+            produced = {
+                stream: Counter(output_lines(f'{self._work_dir}/{digest}.{stream}', path))
+                for stream in ('out', 'err')
+            }
+            wrong = Counter(self._wrong)
+            result = all(produced[stream][line] >= n for (stream, line), n in wrong.items())
+        else:
+            result = failure_signature(self._runner, digest, path) == self._signature
+        self._cache[digest] = result
+
+        for suffix in ('in', 'out', 'err'):
+            try:
+                os.remove(f'{self._work_dir}/{digest}.{suffix}')
+            except FileNotFoundError:
+                pass
+
+        return result
+
+    def _ddmin(self, units: list[str]) -> list[str]:
+        """
+        Removes as many units as possible while the failure still reproduces.
+
+        :param units: The input split into lines or tokens
+
+        :return: A 1-minimal subset of the units
+        """
+
+        n = 2
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            while len(units) >= 2:
+                size = len(units) / n
+                chunks = [(round(i * size), round((i + 1) * size))
+                          for i in range(n)]
+                candidates = [units[:a] + units[b:] for a, b in chunks]
+
+                results = list(pool.map(
+                    lambda c: self._reproduces(''.join(c)), candidates))
+
+                if any(results):
+                    units = candidates[results.index(True)]
+                    n = max(n - 1, 2)
+                    logging.debug(f'Reduced to {len(units)} units')
+                elif n < len(units):
+                    n = min(n * 2, len(units))
+                else:
+                    break
+
+        return units
+
+    def reduce(self, content: str, signature: tuple, wrong: list[tuple[str, str]] = []) -> str:
+        """
+        Reduces an input by lines and then by tokens, until neither shrinks it.
+
+        :param content: The failing input
+        :param signature: The failure signature to preserve
+        :param wrong: The wrong output lines to preserve instead, see `wrong_output`
+
+        :return: The reduced input
+        """
+
+        self._signature = signature
+        self._wrong = wrong
+
+        while True:
+            before = content
+            content = ''.join(self._ddmin(content.splitlines(keepends=True)))
+            logging.info(f'Line pass: {len(content.splitlines())} lines left')
+            content = ''.join(self._ddmin(re.findall(r'\S+\s*', content)))
+            logging.info(f'Token pass: {len(content.split())} tokens left')
+
+            if content == before:
+                return content
+
+
+def reduce_runner(executable: str, case, flags, jobs: int, **kwargs):
+    """
+    Reduces a failing test case to a minimal input with the same failure.
+
+    :param executable: The name of the executable to test
+    :param case: The failing test case
+    :param flags: The flags to pass to the test
+    :param jobs: The number of candidates to run in parallel
+    :param kwargs: Passed on to `create_test`
+    """
+
+    test = create_test(executable, [case], flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+
+    try:
+        if not test.make():
+            logging.error('Failed to Make Tester')
+            return
+
+        if test.run_case(case):
+            logging.warning(f'{case}: Passed, there is nothing to reduce.')
+            return
+
+        input_path = f'{test._test_dir}/{case}.in'
+        signature = failure_signature(test, case, input_path)
+        logging.info(f'Failure signature: {signature}')
+
+        # A case that reports the expected error, or none, fails by its
+        # output, e.g. a wrong location or a wrong line in the .out
+        wrong = []
+        expected = error_message(output_lines(f'{test._test_dir}/{case}.err', input_path))
+        if signature[0] == 'exit' and signature[2] in (expected, ''):
+            wrong = wrong_output(test, case, input_path)
+            if not wrong:
+                logging.error(
+                    f'{case}: Its output differs only by missing lines or input locations, '
+                    'which cannot be preserved while the input shrinks.')
+                return
+            logging.info(f'Preserving the wrong output: {wrong}')
+
+        with open(input_path, 'r') as f:
+            content = f.read()
+
+        reducer = Reducer(test, os.path.join(test._temp_dir, 'reduce'), jobs)
+        reduced = reducer.reduce(content, signature, wrong)
+
+        out_dir = os.path.join(ARTIFACTS_DIR, 'reduce')
+        os.makedirs(out_dir, exist_ok=True)
+        out_path = os.path.join(out_dir, f'{executable}-{case}.in')
+        with open(out_path, 'w') as f:
+            f.write(reduced)
+
+        logging.info(
+            f'Reduced {case}.in from {len(content)} to {len(reduced)} bytes: {out_path}')
+    finally:
+        test.clean()
+
+# ---------------------------------------------------------------------------- #
+# Fuzzing
+
+
+class Coverage:
+
+    CC = 'gcc'
+
+    def __init__(self, test: BaseTest, work_dir: str, build_dir: str) -> None:
+        """
+        Collects the gcov coverage of individual runs of an executable.
+
+        Every run writes its counters under its own GCOV_PREFIX, so runs can
+        happen in parallel. Like the sanitized executable, the instrumented
+        one is built in a copy of the source directory, so the objects and
+        executables of the normal build are never instrumented.
+
+        :param test: The test whose executable is instrumented
+        :param work_dir: The directory to collect the counters in
+        :param build_dir: The directory to copy the sources to and build in
+        """
+
+        self._test = test
+        self._work_dir = work_dir
+        self._build_src_dir = os.path.abspath(os.path.join(build_dir, 'src'))
+        self._bin_dir = os.path.abspath(os.path.join(build_dir, 'bin'))
+        self._gcno: list[str] = []
+
+    def build(self) -> bool:
+        """
+        Makes the executable with gcov instrumentation, which the test then
+        runs. The compiler of the test, e.g. the sanitizing one, is kept.
+
+        :return: True if an instrumented executable was built, False otherwise
+        """
+
+        if not shutil.which('gcov'):
+            return False
+
+        test = self._test
+        src_dir = test._sanitizer._src_dir if test._sanitizer else test._src_dir
+        shutil.copytree(
+            src_dir, self._build_src_dir, dirs_exist_ok=True,
+            ignore=shutil.ignore_patterns(*Sanitizer.BUILD_PRODUCTS))
+        os.makedirs(self._bin_dir, exist_ok=True)
+        test._src_dir = self._build_src_dir
+        test._bin_dir = self._bin_dir
+
+        make_args = test._make_args
+        cc = next(
+            (arg[len('CC='):] for arg in make_args if arg.startswith('CC=')), self.CC)
+        test._make_args = [
+            arg for arg in make_args if not arg.startswith('CC=')] + [f'CC={cc} --coverage']
+        try:
+            built = test.make()
+        finally:
+            test._make_args = make_args
+
+        root = os.path.realpath(os.path.dirname(self._build_src_dir))
+        self._gcno = [
+            os.path.join(path, f)
+            for path, _, files in os.walk(root)
+            for f in files if f.endswith('.gcno')
+        ]
+
+        return built and len(self._gcno) > 0
+
+    def attach(self, test: BaseTest) -> None:
+        """
+        Makes the runs of a test write their counters to the work directory.
+        """
+
+        test._env['GCOV_PREFIX'] = os.path.join(self._work_dir, '{test}')
+
+    def collect(self, test) -> set[tuple]:
+        """
+        Collects and removes the counters of a run.
+
+        :param test: The name of the run
+
+        :return: The covered lines as (file, line) and branches as (file, line, branch)
+        """
+
+        prefix = os.path.join(self._work_dir, str(test))
+
+        gcda = []
+        for gcno in self._gcno:
+            data = prefix + os.path.splitext(gcno)[0] + '.gcda'
+            if not os.path.exists(data):
+                continue
+
+            notes = os.path.splitext(data)[0] + '.gcno'
+            if not os.path.exists(notes):
+                os.symlink(gcno, notes)
+            gcda.append(data)
+
+        features = set()
+        if gcda:
+            proc = subprocess.run(
+                ['gcov', '--branch-probabilities', '--json-format', '--stdout'] + gcda,
+                cwd=prefix,
+                capture_output=True,
+                text=True
+            )
+
+            for line in proc.stdout.splitlines():
+                if not line.startswith('{'):
+                    continue
+                for source in json.loads(line)['files']:
+                    for info in source['lines']:
+                        if info['count']:
+                            features.add((source['file'], info['line_number']))
+                        for i, branch in enumerate(info['branches']):
+                            if branch['count']:
+                                features.add(
+                                    (source['file'], info['line_number'], i))
+
+        shutil.rmtree(prefix, ignore_errors=True)
+        return features
+
+
+class Fuzzer:
+
+    TIMEOUT = 2
+    MAX_MUTATIONS = 4
+
+    def __init__(
+        self,
+        test: BaseTest,
+        out_dir: str,
+        jobs: int,
+        coverage: Coverage | None = None
+    ) -> None:
+        """
+        Mutates inputs and keeps those that reach new code or new behaviour.
+
+        Without coverage, an input is interesting if it produces a failure
+        signature that has not been seen before.
+
+        :param test: A test of the module, used to run the executable
+        :param out_dir: The directory to save interesting inputs, crashes and hangs in
+        :param jobs: The number of inputs to run in parallel
+        :param coverage: The coverage collector of an instrumented executable
+        """
+
+        work_dir = os.path.join(test._temp_dir, 'fuzz')
+        os.makedirs(work_dir, exist_ok=True)
+        for kind in ('queue', 'crashes', 'hangs'):
+            os.makedirs(os.path.join(out_dir, kind), exist_ok=True)
+
+        flags = dict(test._flags, **{'exec-class': False})
+        self._runner = type(test)(
+            [], test._src_dir, test._bin_dir, work_dir, work_dir, '', flags)
+        self._runner._limits = test._limits
+        self._runner._cgroup = test._cgroup
+        self._runner.ADDRESS_SPACE_STAGES = test.ADDRESS_SPACE_STAGES
+        self._runner.TIMEOUT = self.TIMEOUT
+        if test._sanitizer:
+            # Reports go to stderr, and undefined behaviour ends the run
+            self._runner._env['UBSAN_OPTIONS'] = 'halt_on_error=1:print_stacktrace=1'
+        if coverage:
+            coverage.attach(self._runner)
+
+        self._work_dir = work_dir
+        self._out_dir = out_dir
+        self._jobs = jobs
+        self._coverage = coverage
+        self._random = random.Random()
+
+        self._queue: list[str] = []
+        self._tokens: list[str] = []
+        self._executed: set[str] = set()
+        self._covered: set[tuple] = set()
+        self._behaviours: set[tuple] = set()
+        self._findings: dict[str, tuple] = {}
+
+    def _run(self, content: str) -> tuple[tuple, set[tuple]]:
+        """
+        Runs an input.
+
+        :return: The failure signature and the coverage of the run
+        """
+
+        digest = hashlib.sha1(content.encode()).hexdigest()
+        path = f'{self._work_dir}/{digest}.in'
+        with open(path, 'w') as f:
+            f.write(content)
+
+        self._runner.execute(digest)
+        signature = failure_signature(self._runner, digest, path)
+        features = self._coverage.collect(digest) if self._coverage else set()
+
+        for suffix in ('in', 'out', 'err'):
+            try:
+                os.remove(f'{self._work_dir}/{digest}.{suffix}')
+            except FileNotFoundError:
+                pass
+
+        return signature, features
+
+    def _mutate(self, content: str) -> str:
+        """
+        Applies a few random line, token or character mutations to an input.
+        """
+
+        rng = self._random
+        for _ in range(rng.randint(1, self.MAX_MUTATIONS)):
+            lines = content.splitlines(keepends=True) or ['\n']
+            tokens = re.findall(r'\S+\s*', content) or ['\n']
+            i, j = rng.randrange(len(lines)), rng.randrange(len(lines))
+            k = rng.randrange(len(tokens))
+
+            mutation = rng.randrange(8)
+            if mutation == 0:
+                del lines[i]
+            elif mutation == 1:
+                lines.insert(i, lines[j])
+            elif mutation == 2:
+                lines[i], lines[j] = lines[j], lines[i]
+            elif mutation == 3:
+                donor = rng.choice(self._queue).splitlines(keepends=True)
+                lines.insert(i, rng.choice(donor or ['\n']))
+            elif mutation == 4:
+                del tokens[k]
+            elif mutation == 5:
+                tokens.insert(k, tokens[rng.randrange(len(tokens))])
+            elif mutation == 6:
+                tokens[k] = rng.choice(self._tokens or tokens)
+            else:
+                pos = rng.randrange(len(content) + 1)
+                content = content[:pos] + chr(rng.randrange(32, 127)) + content[pos:]
+                continue
+
+            content = ''.join(tokens if mutation in (4, 5, 6) else lines)
+
+        return content
+
+    def _save(self, kind: str, name: str, content: str) -> str:
+        path = os.path.join(self._out_dir, kind, f'{name}.in')
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def _triage(self, content: str, signature: tuple, features: set[tuple], seed: bool) -> None:
+        """
+        Records crashes and hangs, and queues inputs that reach something new.
+        Sanitizer reports are crashes too, as AddressSanitizer exits with 1
+        and UndefinedBehaviorSanitizer would carry on.
+        """
+
+        reported = signature[0] == 'exit' and (
+            signature[2].startswith('SUMMARY: ') or 'runtime error: ' in signature[2])
+        if signature[0] in ('timeout', 'signal') or reported:
+            kind = 'hang' if signature[0] == 'timeout' else 'crash'
+            key = hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+            if key not in self._findings:
+                self._findings[key] = signature
+                path = self._save(
+                    'hangs' if kind == 'hang' else 'crashes', key, content)
+                logging.warning(f'New {kind} {signature}: {path}')
+            return
+
+        new = bool(features - self._covered) or signature not in self._behaviours
+        self._covered |= features
+        self._behaviours.add(signature)
+
+        if seed or new:
+            self._queue.append(content)
+            self._tokens.extend(re.findall(r'\S+\s*', content))
+        if new and not seed:
+            self._save('queue', hashlib.sha1(content.encode()).hexdigest(), content)
+
+    def fuzz(self, seeds: list[str], iterations: int) -> None:
+        """
+        Fuzzes the executable.
+
+        :param seeds: The inputs to start from
+        :param iterations: The number of mutated inputs to run
+        """
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            for content, (signature, features) in zip(seeds, pool.map(self._run, seeds)):
+                self._triage(content, signature, features, seed=True)
+            logging.info(
+                f'Seeded with {len(seeds)} inputs, {len(self._covered)} lines and branches covered')
+
+            # Only inputs that crash or hang, or no inputs at all, leave
+            # nothing to mutate
+            if not self._queue:
+                logging.error('No seed ran without crashing or hanging, nothing to mutate')
+
+            done = 0
+            while self._queue and done < iterations:
+                batch = []
+                while len(batch) < min(self._jobs * 4, iterations - done):
+                    content = self._mutate(self._random.choice(self._queue))
+                    digest = hashlib.sha1(content.encode()).hexdigest()
+                    if digest not in self._executed:
+                        self._executed.add(digest)
+                        batch.append(content)
+
+                results = pool.map(self._run, batch)
+                for content, (signature, features) in zip(batch, results):
+                    self._triage(content, signature, features, seed=False)
+
+                done += len(batch)
+                logging.debug(
+                    f'{done}/{iterations} executions, {len(self._queue)} queued, '
+                    f'{len(self._covered)} covered, {len(self._findings)} findings')
+
+        elapsed = time.monotonic() - start
+        logging.info(
+            f'Fuzzing finished: {done / elapsed:.1f} executions per second, '
+            f'{len(self._findings)} unique crashes and hangs in {self._out_dir}')
+
+
+def fuzz_runner(executable: str, test_cases, flags, jobs: int, iterations: int, **kwargs):
+    """
+    Fuzzes an executable, using its test cases as seeds.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to use as seeds
+    :param flags: The flags to pass to the test
+    :param jobs: The number of inputs to run in parallel
+    :param iterations: The number of mutated inputs to run
+    :param kwargs: Passed on to `create_test`
+    """
+
+    test = create_test(executable, test_cases, flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+
+    try:
+        coverage = Coverage(
+            test,
+            os.path.join(test._temp_dir, 'coverage'),
+            os.path.join(ARTIFACTS_DIR, 'coverage', executable)
+        )
+        if coverage.build():
+            logging.info('Using gcov coverage feedback')
+        else:
+            logging.warning(
+                'gcov coverage is unavailable, using output feedback instead')
+            coverage = None
+            if not test.make():
+                logging.error('Failed to Make Tester')
+                return
+
+        seeds = []
+        for case in test._test_names:
+            with open(f'{test._test_dir}/{case}.in', 'r', errors='replace') as f:
+                seeds.append(f.read())
+
+        out_dir = os.path.join(ARTIFACTS_DIR, 'fuzz', executable)
+        Fuzzer(test, out_dir, jobs, coverage).fuzz(seeds, iterations)
+    finally:
+        test.clean()
+
+# ---------------------------------------------------------------------------- #
+# Corpus Distillation
+
+
+def read_tier(path: str) -> list[int]:
+    """
+    Reads the test cases of a tier manifest.
+    """
+
+    with open(path, 'r') as f:
+        return [
+            int(line) for line in map(str.strip, f)
+            if line and not line.startswith('#')
+        ]
+
+
+class Distiller:
+
+    # The `executable: file:line:column: ` prefix of error messages
+    LOCATION_RE = re.compile(r'^\S+: \S+:\d+:\d+: ')
+
+    def __init__(self, test: BaseTest, coverage: Coverage, jobs: int) -> None:
+        """
+        Selects a small subset of the test cases that covers the same lines,
+        branches and error messages as all of them.
+
+        :param test: The test whose cases to distill, running the instrumented executable
+        :param coverage: The coverage collector of the instrumented executable
+        :param jobs: The number of cases to run in parallel
+        """
+
+        coverage.attach(test)
+
+        self._test = test
+        self._coverage = coverage
+        self._jobs = jobs
+
+    def _messages(self, case) -> set[tuple]:
+        """
+        The distinct error messages of a run, without their locations, names
+        and numbers.
+        """
+
+        try:
+            with open(f'{self._test._temp_dir}/{case}.err', 'r', errors='replace') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return set()
+
+        messages = set()
+        for line in lines:
+            message = self.LOCATION_RE.sub('', line.strip())
+            message = re.sub(r"'[^']*'", "'*'", message)
+            message = re.sub(r'\d+', 'N', message)
+            if message:
+                messages.add(('message', message))
+
+        return messages
+
+    def _features(self, case) -> set[tuple]:
+        """
+        Runs a case.
+
+        :return: Its covered lines and branches, and its error messages
+        """
+
+        self._test.execute(case)
+        return self._coverage.collect(case) | self._messages(case)
+
+    def _duration(self, case) -> float:
+        return self._test._stats.get(case, {}).get('execute', (0, 0))[0]
+
+    def distill(self) -> list:
+        """
+        Runs all cases, and greedily selects the case that adds the most
+        uncovered features, preferring faster ones, until all are covered.
+
+        :return: The selected cases
+        """
+
+        cases = self._test._test_names
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            features = dict(zip(cases, pool.map(self._features, cases)))
+
+        uncovered = set().union(*features.values())
+        kinds = {
+            'lines': sum(1 for f in uncovered if len(f) == 2 and f[0] != 'message'),
+            'branches': sum(1 for f in uncovered if len(f) == 3),
+            'error messages': sum(1 for f in uncovered if f[0] == 'message'),
+        }
+
+        selected = []
+        while uncovered:
+            case = max(
+                features,
+                key=lambda c: (len(features[c] & uncovered), -self._duration(c)))
+            uncovered -= features.pop(case)
+            selected.append(case)
+
+        total = sum(self._duration(c) for c in cases)
+        kept = sum(self._duration(c) for c in selected)
+        logging.info(
+            f'{len(selected)} of {len(cases)} cases cover all '
+            + ', '.join(f'{n} {kind}' for kind, n in kinds.items()))
+        if total:
+            logging.info(f'They take {kept / total:.1%} of the execution time of all cases')
+
+        return sorted(selected)
+
+
+def distill_runner(executable: str, test_cases, flags, jobs: int, **kwargs):
+    """
+    Distills the test cases of an executable into the fast tier.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to distill
+    :param flags: The flags to pass to the test
+    :param jobs: The number of cases to run in parallel
+    :param kwargs: Passed on to `create_test`
+    """
+
+    flags = dict(flags, **{
+        'exec-class': False, 'memory-check': False, 'live-diff': False,
+        'profile': False, 'sanitize': False})
+    test = create_test(executable, test_cases, flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+
+    # The instrumented executable is slower, keep its durations out of the timeouts
+    test._timings = None
+
+    try:
+        coverage = Coverage(
+            test,
+            os.path.join(test._temp_dir, 'coverage'),
+            os.path.join(ARTIFACTS_DIR, 'coverage', executable)
+        )
+        if not coverage.build():
+            logging.error('Distilling requires gcov and a coverage build.')
+            sys.exit(1)
+
+        selected = Distiller(test, coverage, jobs).distill()
+    finally:
+        test.clean()
+
+    out_dir = os.path.join(ARTIFACTS_DIR, 'tiers')
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = os.path.join(out_dir, f'{executable}.fast')
+    with open(manifest, 'w') as f:
+        f.write(f'# {executable} cases covering the lines, branches and error messages of all\n')
+        f.writelines(f'{case}\n' for case in selected)
+
+    logging.info(f'Fast tier saved to {manifest}, run it with --tier=fast')
+
+# ---------------------------------------------------------------------------- #
+# Benchmarks
+
+
+class Benchmark:
+
+    METRICS = ['instructions', 'l1_misses', 'll_misses', 'peak_heap']
+
+    def __init__(self, test: BaseTest, out_dir: str, jobs: int) -> None:
+        """
+        Measures deterministic performance counters of the executable with
+        cachegrind and massif, and keeps them per commit of the compiler.
+
+        :param test: The test whose executable is measured
+        :param out_dir: The directory to keep the measurements in
+        :param jobs: The number of tests to measure in parallel
+        """
+
+        self._test = test
+        self._out_dir = out_dir
+        self._jobs = jobs
+
+    def _cachegrind(self, case) -> dict[str, int]:
+        """
+        Counts the instructions and cache misses of a test.
+        """
+
+        out = f'{self._test._temp_dir}/{case}.cachegrind'
+        ret = self._test.valgrind(
+            case,
+            ['--tool=cachegrind', '--cache-sim=yes',
+             f'--cachegrind-out-file={out}'],
+            f'{out}.log',
+            'cachegrind'
+        )
+        if ret == -1:
+            return {}
+
+        events, summary = [], []
+        with open(out, 'r') as f:
+            for line in f:
+                if line.startswith('events:'):
+                    events = line.split()[1:]
+                elif line.startswith('summary:'):
+                    summary = list(map(int, line.split()[1:]))
+        counts = dict(zip(events, summary))
+
+        return {
+            'instructions': counts.get('Ir', 0),
+            'l1_misses': sum(counts.get(e, 0) for e in ('I1mr', 'D1mr', 'D1mw')),
+            'll_misses': sum(counts.get(e, 0) for e in ('ILmr', 'DLmr', 'DLmw')),
+        }
+
+    def _massif(self, case) -> dict[str, int]:
+        """
+        Measures the peak heap usage of a test.
+        """
+
+        out = f'{self._test._temp_dir}/{case}.massif'
+        ret = self._test.valgrind(
+            case,
+            ['--tool=massif', f'--massif-out-file={out}'],
+            f'{out}.log',
+            'massif'
+        )
+        if ret == -1:
+            return {}
+
+        peak = 0
+        heap = 0
+        with open(out, 'r') as f:
+            for line in f:
+                if line.startswith('mem_heap_B='):
+                    heap = int(line.split('=')[1])
+                elif line.startswith('mem_heap_extra_B='):
+                    peak = max(peak, heap + int(line.split('=')[1]))
+
+        return {'peak_heap': peak}
+
+    def measure(self, case) -> dict[str, int]:
+        """
+        Measures a test.
+
+        :return: The metrics of the test, see METRICS
+        """
+
+        metrics = self._cachegrind(case)
+        metrics.update(self._massif(case))
+        if len(metrics) < len(self.METRICS):
+            logging.error(f'{case}: Benchmark timed out.')
+        else:
+            logging.info(f'{case}: {metrics}')
+
+        return metrics
+
+    def commit(self, rev: str = 'HEAD') -> str:
+        """
+        Resolves a revision of the compiler's repository.
+
+        :return: The commit hash, with a -dirty suffix for uncommitted changes to HEAD
+        """
+
+        proc = subprocess.run(
+            ['git', 'rev-parse', rev], cwd=self._test._src_dir,
+            capture_output=True, text=True)
+        if proc.returncode != 0:
+            return rev if rev != 'HEAD' else 'unknown'
+
+        commit = proc.stdout.strip()
+        if rev == 'HEAD':
+            status = subprocess.run(
+                ['git', 'status', '--porcelain', '--untracked-files=no', '.'],
+                cwd=self._test._src_dir, capture_output=True, text=True)
+            if status.stdout.strip():
+                commit += '-dirty'
+
+        return commit
+
+    def _load(self, commit: str) -> dict[str, dict[str, int]]:
+        try:
+            with open(os.path.join(self._out_dir, f'{commit}.json'), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _baseline(self, commit: str, against: str | None) -> str | None:
+        """
+        Finds the commit to compare against: the given revision, or else the
+        most recently measured other commit.
+        """
+
+        if against:
+            return self.commit(against)
+
+        files = [
+            os.path.join(self._out_dir, f) for f in os.listdir(self._out_dir)
+            if f.endswith('.json') and f != f'{commit}.json'
+        ]
+        if not files:
+            return None
+
+        return os.path.basename(max(files, key=os.path.getmtime))[:-len('.json')]
+
+    def run(self, tolerance: float, against: str | None = None) -> bool:
+        """
+        Measures the tests, stores the results and compares them to a baseline.
+
+        :param tolerance: The relative growth of a metric that counts as a regression
+        :param against: The revision to compare against
+
+        :return: False if any metric regressed, True otherwise
+        """
+
+        os.makedirs(self._out_dir, exist_ok=True)
+        commit = self.commit()
+
+        cases = self._test._test_names
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            measured = dict(zip(map(str, cases), pool.map(self.measure, cases)))
+
+        results = self._load(commit)
+        results.update({case: m for case, m in measured.items() if m})
+        with open(os.path.join(self._out_dir, f'{commit}.json'), 'w') as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        logging.info(f'Benchmark of {commit} saved to {self._out_dir}')
+
+        baseline_commit = self._baseline(commit, against)
+        baseline = self._load(baseline_commit) if baseline_commit else {}
+        if not baseline:
+            logging.warning('No baseline to compare against.')
+            return True
+
+        logging.info(f'Comparing against {baseline_commit}')
+        regressions = []
+        for case, metrics in measured.items():
+            for metric, value in metrics.items():
+                old = baseline.get(case, {}).get(metric)
+                if not old:
+                    continue
+
+                change = (value - old) / old
+                if change > tolerance:
+                    logging.error(
+                        f'{case}: {metric} grew by {change:.2%} ({old} -> {value})')
+                    regressions.append((case, metric))
+                elif change < -tolerance:
+                    logging.info(
+                        f'{case}: {metric} shrank by {-change:.2%} ({old} -> {value})')
+
+        for metric in self.METRICS:
+            old = sum(baseline.get(c, {}).get(metric, 0) for c in measured)
+            new = sum(m.get(metric, 0) for c, m in measured.items()
+                      if baseline.get(c, {}).get(metric))
+            if old:
+                logging.info(f'Total {metric}: {(new - old) / old:+.2%}')
+
+        if regressions:
+            logging.error(
+                f'{len(regressions)} metrics grew by more than {tolerance:.2%}')
+            return False
+
+        return True
+
+
+def bench_runner(
+    executable: str,
+    test_cases,
+    flags,
+    jobs: int,
+    tolerance: float,
+    against: str | None = None,
+    **kwargs
+):
+    """
+    Benchmarks an executable on its test cases, and fails on regressions.
 
-        cmd_args = [
-            f'{self._bin_dir}/{self.EXEC}'
-        ]
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to benchmark
+    :param flags: The flags to pass to the test
+    :param jobs: The number of tests to measure in parallel
+    :param tolerance: The relative growth of a metric that counts as a regression
+    :param against: The revision of the compiler to compare against
+    :param kwargs: Passed on to `create_test`
+    """
 
-        temp_out = f'{self._temp_dir}/{test}.out'
-        temp_err = f'{self._temp_dir}/{test}.err'
+    if not shutil.which('valgrind'):
+        logging.error('Benchmarks require valgrind.')
+        sys.exit(1)
 
-        with open(temp_out, 'w') as f_out, open(temp_err, 'w') as f_err:
+    test = create_test(executable, test_cases, flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
 
-            logging.debug(f'Command: {cmd_args}')
-            logging.debug(f'stdin: {self._test_dir}/{test}.in')
-            with open(f'{self._test_dir}/{test}.in', 'r') as f_in:
-                process = subprocess.Popen(
-                    cmd_args,
-                    stdin=f_in,
-                    stdout=f_out,
-                    stderr=f_err,
-                    cwd=self._bin_dir,
-                    preexec_fn=os.setsid  # Create a new process group
-                )
+    try:
+        if not test.make():
+            logging.error('Failed to Make Tester')
+            sys.exit(1)
 
-                if process_handler(process, self.TIMEOUT) == -1:
-                    logging.error(f'Execution of {test} timed out.')
-                    return False
+        out_dir = os.path.join(ARTIFACTS_DIR, 'bench', executable)
+        passed = Benchmark(test, out_dir, jobs).run(tolerance, against)
+    finally:
+        test.clean()
 
-        return True
+    if not passed:
+        sys.exit(1)
 
-    def mem_check(self, test) -> bool:
-        """
-        Perform a memory check.
+# ---------------------------------------------------------------------------- #
+# A/B Comparison
 
-        :param test: The test to check
 
-        :return: True if the memory check passed, False otherwise
-        """
+def bootstrap(
+    samples: list[list[float]],
+    statistic,
+    rng: random.Random,
+    resamples: int = 1000,
+    confidence: float = 0.95
+) -> tuple[float, float, float]:
+    """
+    Estimates a statistic with a percentile bootstrap confidence interval.
 
-        cmd_args = [
-            'valgrind',
-            '-s',
-            '--leak-check=full',
-            '--show-leak-kinds=all',
-            '--errors-for-leak-kinds=all',
-            '--error-exitcode=255',
-            f'{self._bin_dir}/{self.EXEC}'
-        ]
+    :param samples: The samples the statistic is computed from, each resampled on its own
+    :param statistic: The statistic, called with one list per sample
+    :param rng: The random number generator to resample with
+    :param resamples: The number of resamples
+    :param confidence: The confidence level of the interval
 
-        # Check for leaks
-        with open(f'{self._temp_dir}/{test}.valgrind', 'w') as capture:
-
-            logging.debug(f'Valgrind command: {cmd_args}')
-            with open(f'{self._test_dir}/{test}.in', 'r') as f_in:
-                valgrind_proc = subprocess.Popen(
-                    cmd_args,
-                    stdout=subprocess.DEVNULL,
-                    stdin=f_in,
-                    stderr=capture,
-                    cwd=self._bin_dir,
-                    preexec_fn=os.setsid  # Create a new process group
-                )
-                logging.debug(f'Valgrind Process ID: {valgrind_proc.pid}')
+    :return: The estimate and the lower and upper bounds of the interval
+    """
 
-                if process_handler(valgrind_proc, self.TIMEOUT) == -1:
-                    logging.error(f'Memory check of {test} timed out.')
-                    return False
+    estimate = statistic(*samples)
+    estimates = sorted(
+        statistic(*(rng.choices(sample, k=len(sample)) for sample in samples))
+        for _ in range(resamples)
+    )
+    tail = (1 - confidence) / 2
 
-        return True
+    return (
+        estimate,
+        estimates[int(tail * resamples)],
+        estimates[min(int((1 - tail) * resamples), resamples - 1)]
+    )
 
 
-class ScannerTest(BaseTest):
+class ABComparison:
 
-    MAKE = 'testscanner'
-    EXEC = 'testscanner'
+    STAGES = ['execute', 'execute_class']
 
+    def __init__(self, baseline: BaseTest, candidate: BaseTest, repeat: int, jobs: int) -> None:
+        """
+        Runs two builds of the executable on the same tests, and compares their
+        output with each other and their durations and peak memory usage.
 
-class ParserTest(BaseTest):
+        :param baseline: The test that runs the baseline build
+        :param candidate: The test that runs the candidate build
+        :param repeat: The number of times to run each build on each test
+        :param jobs: The number of tests to run in parallel
+        """
 
-    MAKE = 'testparser'
-    EXEC = 'amplc'
+        self._baseline = baseline
+        self._candidate = candidate
+        self._repeat = repeat
+        self._jobs = jobs
+        self._rng = random.Random(0)
 
+    def _run(self, test: BaseTest, case) -> tuple[float, int] | None:
+        """
+        Runs a build on a test.
 
-class HashtableTest(RedirectionBaseTest):
+        :return: The duration and peak RSS in KiB over all stages, or None if it timed out
+        """
 
-    MAKE = 'testhashtable'
-    EXEC = 'testhashtable'
+        test._stats.pop(case, None)
+        test.execute(case)
+        if test._returncodes.get(case) == -1:
+            return None
 
+        stats = [test._stats[case][stage]
+                 for stage in self.STAGES if stage in test._stats.get(case, {})]
 
-class SymboltableTest(RedirectionBaseTest):
+        return sum(s[0] for s in stats), max(s[1] for s in stats)
 
-    MAKE = 'testsymboltable'
-    EXEC = 'testsymboltable'
+    def _differences(self, case) -> list[str]:
+        """
+        Compares the output of the builds on a test, and prints the differences.
 
+        :return: The output files that differ
+        """
 
-class TypecheckingTest(BaseTest):
+        differences = []
+        for output_type in self._baseline.DIFF_FILES:
+            cmd_args = [
+                'diff',
+                f'{self._baseline._temp_dir}/{case}.{output_type}',
+                f'{self._candidate._temp_dir}/{case}.{output_type}'
+            ]
+            if self._baseline._flags['side-by-side']:
+                cmd_args[1:1] = ['--side-by-side', '--suppress-common-lines']
 
-    MAKE = 'testtypechecking'
-    EXEC = 'amplc'
+            diff_proc = subprocess.run(cmd_args, stdout=subprocess.PIPE)
+            if diff_proc.returncode != 0:
+                with BaseTest._print_lock:
+                    logging.error(f'{case}: {output_type} differs between the builds.')
+                    sys.stdout.buffer.write(diff_proc.stdout)
+                    sys.stdout.flush()
+                differences.append(output_type)
 
-    def make(self) -> bool:
-        if super().make():
-            return True
-        else:
-            self.MAKE = 'amplc'
+        return differences
 
-        return super().make()
+    def compare(self, case) -> dict | None:
+        """
+        Runs both builds on a test, alternating which goes first.
 
+        :return: The differing output files, and the durations and peak RSS of
+            each build, or None if a build timed out
+        """
 
-class CodegenTest(BaseTest):
+        result = {
+            'differences': [],
+            'time': {'baseline': [], 'candidate': []},
+            'rss': {'baseline': [], 'candidate': []},
+        }
 
-    MAKE = 'amplc'
-    EXEC = 'amplc'
-    DIFF_FILES = ['out', 'err', 'class.out', 'class.err']
+        for i in range(self._repeat):
+            builds = [('baseline', self._baseline), ('candidate', self._candidate)]
+            for build, test in builds if i % 2 == 0 else reversed(builds):
+                measured = self._run(test, case)
+                if measured is None:
+                    logging.error(f'{case}: The {build} build timed out.')
+                    return None
 
-    def make(self) -> bool:
+                result['time'][build].append(measured[0])
+                result['rss'][build].append(measured[1])
 
-        # Remove jasmin and class files from bin
-        for f in os.listdir(self._bin_dir):
-            if f.endswith('.jasmin') or f.endswith('.class'):
-                os.remove(os.path.join(self._bin_dir, f))
+            if i == 0:
+                result['differences'] = self._differences(case)
 
-        return super().make()
+        return result
 
-    def execute(self, test) -> bool:
+    def _ratio(self, baseline: list[float], candidate: list[float]) -> tuple[float, float, float] | None:
         """
-        Runs the test.
+        The ratio of the mean of the candidate to that of the baseline, with
+        its confidence interval. Runs too short to sample the RSS of are left out.
         """
 
-        if not super().execute(test):
-            return True
-
-        if self._flags.get('exec-class', False):
-            return self.execute_class(test)
+        baseline = [b for b in baseline if b > 0]
+        candidate = [c for c in candidate if c > 0]
+        if not baseline or not candidate:
+            return None
 
-        return True
+        return bootstrap(
+            [baseline, candidate],
+            lambda b, c: statistics.fmean(c) / statistics.fmean(b),
+            self._rng
+        )
 
-    def execute_class(self, test) -> bool:
-        """
-        Runs the class file.
+    def run(self) -> bool:
         """
-        cmd_args = [
-            'java',
-            f'test{test}',
-        ]
+        Compares the builds on all tests, and reports the per test and overall
+        ratios of the candidate to the baseline.
 
-        temp_out = f'{self._temp_dir}/{test}.class.out'
-        temp_err = f'{self._temp_dir}/{test}.class.err'
+        :return: True if the builds produced the same output on every test, False otherwise
+        """
 
-        logging.info("Executing compiled AMPL file")
-        with open(temp_out, 'w') as f_out, open(temp_err, 'w') as f_err:
+        cases = self._baseline._test_names
+        with ThreadPoolExecutor(max_workers=self._jobs) as pool:
+            results = dict(zip(cases, pool.map(self.compare, cases)))
 
-            logging.debug(f'Command: {cmd_args}')
-            with open(f'{self._test_dir}/{test}.class.in', 'r') as f_in:
-                process = subprocess.Popen(
-                    cmd_args,
-                    stdout=f_out,
-                    stderr=f_err,
-                    stdin=f_in,
-                    cwd=self._bin_dir,
-                    preexec_fn=os.setsid  # Create a new process group
-                )
+        ratios: dict[str, list[float]] = {'time': [], 'rss': []}
+        for case, result in results.items():
+            if result is None:
+                continue
 
-                ret = process_handler(process, self.TIMEOUT)
-                logging.debug(f'Process returned {ret}')
-                if ret != 0:
-                    logging.error(
-                        f'Unable to execute {test}.class, execution finished with error code {ret}')
-                    return True
-                elif ret == -1:
-                    return False
+            line = []
+            for metric, label in (('time', 'time'), ('rss', 'peak RSS')):
+                ratio = self._ratio(result[metric]['baseline'], result[metric]['candidate'])
+                if ratio:
+                    ratios[metric].append(ratio[0])
+                    line.append(f'{label} {ratio[0]:.3f}x [{ratio[1]:.3f}, {ratio[2]:.3f}]')
+            logging.info(f'{case}: {", ".join(line)}')
 
-        return True
+        for metric, label in (('time', 'time'), ('rss', 'peak RSS')):
+            if not ratios[metric]:
+                continue
 
-# ---------------------------------------------------------------------------- #
-# Test Runner
+            mean, low, high = bootstrap(
+                [[math.log(r) for r in ratios[metric]]],
+                lambda logs: math.exp(statistics.fmean(logs)),
+                self._rng
+            )
+            logging.info(
+                f'Geometric mean {label} ratio: {mean:.3f}x [{low:.3f}, {high:.3f}] over {len(ratios[metric])} tests')
 
+        failed = [case for case, result in results.items() if result is None]
+        differing = [case for case, result in results.items()
+                     if result and result['differences']]
+        if failed:
+            logging.error(f'Timed out tests: {failed}')
+        if differing:
+            logging.error(f'Output differs on {len(differing)} of {len(cases)} tests: {differing}')
+        else:
+            logging.info('The builds produced the same output on every test.')
 
-TESTS = {
-    'scanner': ScannerTest,
-    'parser': ParserTest,
-    'hashtable': HashtableTest,
-    'symboltable': SymboltableTest,
-    'typechecking': TypecheckingTest,
-    'codegen': CodegenTest
-}
+        return not failed and not differing
 
 
-def test_runner(
+def ab_runner(
     executable: str,
     test_cases,
     flags,
-    cwd: str = os.getcwd(),
-    src_dir: str = '../src',
-    bin_dir: str = '../bin',
-    result_dir: str = '',
-    stream: str = 'both'
+    jobs: int,
+    baseline: str,
+    candidate: str,
+    repeat: int,
+    **kwargs
 ):
     """
-    Creates a new test.
+    Compares the output and performance of two builds of an executable.
 
     :param executable: The name of the executable to test
     :param test_cases: The test cases to run
-    :param perform_mem_check: Whether to perform a memory check on the executable
-    :param side_by_side: Whether to display the diff side by side
-    :param src_dir: The source directory
-    :param bin_dir: The binary directory
-    :param tests_dir: The tests directory
-    :param result_dir: The directory to save to
+    :param flags: The flags to pass to the tests
+    :param jobs: The number of tests to run in parallel
+    :param baseline: The bin directory of the baseline build
+    :param candidate: The bin directory of the candidate build
+    :param repeat: The number of times to run each build on each test
+    :param kwargs: Passed on to `create_test`
     """
 
-    if executable not in TESTS:
-        logging.error(f'Invalid executable {executable}')
+    # Both builds have to run the same stages to completion
+    flags = dict(flags, **{
+        'memory-check': False, 'live-diff': False, 'profile': False, 'sanitize': False})
+
+    tests = []
+    for build, bin_dir in (('baseline', baseline), ('candidate', candidate)):
+        test = create_test(
+            executable,
+            test_cases,
+            flags,
+            bin_dir=os.path.abspath(bin_dir),
+            temp_dir=os.path.join('temp', f'ab-{build}'),
+            **kwargs
+        )
+        if not os.path.isfile(f'{test._bin_dir}/{test.EXEC}'):
+            logging.error(f'The {build} build has no {test.EXEC} in {test._bin_dir}')
+            sys.exit(1)
+
+        os.makedirs(test._temp_dir, exist_ok=True)
+        tests.append(test)
+
+    try:
+        passed = ABComparison(*tests, repeat, jobs).run()
+    finally:
+        for test in tests:
+            test.clean()
+
+    if not passed:
         sys.exit(1)
 
-    diff_stream = []
-    diff_stream.append('out') if stream in ['out', 'both'] else None
-    diff_stream.append('err') if stream in ['err', 'both'] else None
-    if flags.get('exec-class', False) and executable == 'codegen':
-        diff_stream.append('class.out') if stream in [
-            'out', 'both', 'class'] else None
-        diff_stream.append('class.err') if stream in [
-            'err', 'both', 'class'] else None
+# ---------------------------------------------------------------------------- #
+# Golden Output Regeneration
 
-    if len(test_cases) == 0:
-        # count all the .in file in the module directory
-        in_files = filter(lambda f: f.endswith(
-            '.in') and "class" not in f, os.listdir(executable)
-        )
-        test_cases = list(map(lambda f: int(f.split('.')[0]), in_files))
-        test_cases.sort()
 
-    logging.debug(f'Test cases\n{pformat(test_cases, compact=True)}')
+def write_atomic(path: str, content: bytes) -> None:
+    """
+    Replaces a file by writing a temp file next to it and renaming it, so the
+    file is never left half written.
 
-    # Create the test
-    test = TESTS[executable](
-        test_cases,
-        os.path.join(cwd, src_dir),
-        os.path.join(cwd, bin_dir),
-        os.path.join(cwd, executable),
-        os.path.join(cwd, 'temp'),
-        result_dir,
-        flags
-    )
-    test.DIFF_FILES = diff_stream
+    :param path: The path of the file
+    :param content: The new content of the file
+    """
 
-    # Run the test
-    logging.debug(f'Running {executable} tests...')
-    test.test()
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def regen_runner(executable: str, test_cases, flags, jobs: int, **kwargs):
+    """
+    Regenerates the expected output of test cases from the current executable.
+    Only the files whose content changed are written.
+
+    :param executable: The name of the executable to test
+    :param test_cases: The test cases to regenerate
+    :param flags: The flags to pass to the test
+    :param jobs: The number of tests to run in parallel
+    :param kwargs: Passed on to `create_test`
+    """
+
+    # The executables have to run to completion, undisturbed
+    flags = dict(flags, **{'memory-check': False, 'live-diff': False, 'profile': False})
+    test = create_test(executable, test_cases, flags, **kwargs)
+    os.makedirs(test._temp_dir, exist_ok=True)
+
+    # file -> 'changed', 'new' or 'unchanged'
+    status: dict[str, str] = {}
+    failed = []
+
+    def regen(case):
+        if not os.path.exists(f'{test._test_dir}/{case}.in'):
+            logging.warning(f'{case}: No input file, skipping.')
+            return
+
+        if not test.execute(case) or test._returncodes.get(case) == -1 \
+                or test._class_returncodes.get(case) == -1 or case in test._breaches:
+            logging.error(f'{case}: Did not run to completion, keeping its expected output.')
+            failed.append(case)
+            return
+
+        for output_type in test.DIFF_FILES:
+            name = f'{case}.{output_type}'
+            with open(f'{test._temp_dir}/{name}', 'rb') as f:
+                content = f.read()
+
+            golden = f'{test._test_dir}/{name}'
+            try:
+                with open(golden, 'rb') as f:
+                    if f.read() == content:
+                        status[name] = 'unchanged'
+                        continue
+                status[name] = 'changed'
+            except FileNotFoundError:
+                status[name] = 'new'
+
+            write_atomic(golden, content)
+            logging.debug(f'{name}: {status[name]}')
+
+    try:
+        if not test.make():
+            logging.error('Failed to Make Tester')
+            sys.exit(1)
+
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(regen, test._test_names))
+
+        if test._timings is not None:
+            test._timings.save()
+    finally:
+        test.clean()
+
+    for kind in ('changed', 'new'):
+        names = sorted(
+            (n for n, s in status.items() if s == kind),
+            key=lambda n: (int(n.split('.')[0]), n))
+        if names:
+            logging.info(f'{kind.capitalize()}: {" ".join(names)}')
+
+    counts = {kind: list(status.values()).count(kind)
+              for kind in ('changed', 'new', 'unchanged')}
+    logging.info(
+        f"{executable}: {counts['changed']} changed, {counts['new']} new, "
+        f"{counts['unchanged']} unchanged files")
+
+    if failed:
+        logging.error(f'Failed tests: {sorted(failed)}')
+        sys.exit(1)
 
 # ---------------------------------------------------------------------------- #
 # Argument Parsing and Event Handling
@@ -662,6 +4111,109 @@ def parse_args(args: dict):
     return modules, cases
 
 
+def history_query(args: dict, module: str, cwd: str = os.getcwd()):
+    """
+    Answers a query on the run history.
+
+    :param args: The command line arguments
+    :param module: The module to query
+    """
+
+    history = History(os.path.join(cwd, ARTIFACTS_DIR, 'history.db'))
+    runs = int(args['--runs'])
+
+    if args['slowest']:
+        rows = history.slowest(module, args['--stage'], runs, int(args['--limit']))
+        print(f'{"case":>6} {"mean (s)":>10} {"max (s)":>10} {"max RSS (KiB)":>14} {"runs":>5}')
+        for case, mean, longest, rss, samples in rows:
+            print(f'{case:>6} {mean:>10.4f} {longest:>10.4f} {rss:>14} {samples:>5}')
+
+    elif args['case']:
+        case = int(args['<test>'])
+        rows = history.case(module, case, runs)
+        if not rows:
+            logging.warning(f'{case}: Not in the history of {module}.')
+            return
+
+        for run, started, binary, passed, failures, seconds in rows:
+            result = colored('pass', 'green') if passed else colored(
+                f'fail {failures}', 'red')
+            duration = f'{seconds:.4f}s' if seconds is not None else '-'
+            print(f'{run:>6} {started} {binary[:10]} {duration:>10} {result}')
+
+        # The first failure after the last pass, or the other way around
+        last_pass = max((i for i, row in enumerate(rows) if row[3]), default=None)
+        last_fail = max((i for i, row in enumerate(rows) if not row[3]), default=None)
+        if rows[-1][3]:
+            since = rows[0][0] if last_fail is None else rows[last_fail + 1][0]
+            logging.info(f'{case}: Passing since run {since}.')
+        elif last_pass is None:
+            logging.warning(f'{case}: Failed in all of the last {len(rows)} runs.')
+        else:
+            run, started, binary = rows[last_pass + 1][:3]
+            logging.warning(
+                f'{case}: Regressing since run {run} on {started} (binary {binary[:10]}).')
+
+        rows = history.case_bytecode(module, case, runs)
+        if rows:
+            print(f'{"run":>6} {"instructions":>12} {"bytes":>8} {"methods":>7} '
+                  f'{"constants":>9} {"stack":>5} {"locals":>6} {"JVM (s)":>8}')
+        for run, instructions, code_bytes, methods, constants, stack, local, seconds in rows:
+            duration = f'{seconds:.4f}' if seconds is not None else '-'
+            print(f'{run:>6} {instructions:>12} {code_bytes:>8} {methods:>7} '
+                  f'{constants:>9} {stack:>5} {local:>6} {duration:>8}')
+
+    elif args['bytecode']:
+        print(f'{"run":>6} {"started":<19} {"binary":<10} {"cases":>5} {"instructions":>12} '
+              f'{"bytes":>9} {"methods":>7} {"constants":>9} {"stack":>5} {"locals":>6} {"JVM (s)":>8}')
+        for row in history.bytecode(module, runs):
+            run, started, binary, cases, instructions, code_bytes, methods, constants = row[:8]
+            stack, local, seconds = row[8:]
+            duration = f'{seconds:.3f}' if seconds is not None else '-'
+            print(f'{run:>6} {started:<19} {binary[:10]:<10} {cases:>5} {instructions:>12} '
+                  f'{code_bytes:>9} {methods:>7} {constants:>9} {stack:>5} {local:>6} {duration:>8}')
+
+    else:
+        print(f'{"run":>6} {"started":<19} {"binary":<10} {"passed":>9}')
+        for run, started, binary, passed, total in history.runs(module, runs):
+            print(f'{run:>6} {started:<19} {binary[:10]:<10} {passed or 0:>4}/{total:<4}')
+
+
+def parse_limits(spec: str) -> dict[str, int]:
+    """
+    Parses resource limits of the form `cpu=300,mem=4096`.
+
+    Limits of 0 are left unlimited.
+    """
+
+    limits = {}
+    for item in filter(None, spec.split(',')):
+        name, _, value = item.partition('=')
+        if name not in RLIMITS or not value.isdigit():
+            logging.error(f'Invalid resource limit {item}')
+            sys.exit(1)
+        if int(value):
+            limits[name] = int(value)
+
+    logging.debug(f'Resource limits\n{pformat(limits, compact=True)}')
+    return limits
+
+
+def setup_cgroup(cgroup: str) -> None:
+    """
+    Delegates the memory and pids controllers to the children of a cgroup v2
+    directory, in which every test process gets its own cgroup.
+    """
+
+    try:
+        os.makedirs(cgroup, exist_ok=True)
+        with open(os.path.join(cgroup, 'cgroup.subtree_control'), 'w') as f:
+            f.write('+memory +pids')
+    except OSError as e:
+        logging.error(f'Could not set up cgroup {cgroup}: {e}')
+        sys.exit(1)
+
+
 def handle_keyboard_interrupt(sig, frame):
     """Handles keyboard interrupts."""
 
@@ -674,7 +4226,7 @@ def handle_keyboard_interrupt(sig, frame):
 
 def main():
 
-    VERSION = '6.4.0'
+    VERSION = '6.21.0'
 
     # Interrupt handler
     signal.signal(signal.SIGINT, handle_keyboard_interrupt)
@@ -690,6 +4242,19 @@ def main():
     # Argument parsing
     logging.info(f'Running Test script version {VERSION}')
     logging.debug(f'Arguments\n{pformat(args)}')
+
+    if args['worker']:
+        if 'JASMIN_JAR' not in os.environ:
+            os.environ['JASMIN_JAR'] = os.path.join(os.getcwd(), 'jasmin.jar')
+        cgroup = os.path.abspath(args['--cgroup']) if args['--cgroup'] else ''
+        if cgroup:
+            setup_cgroup(cgroup)
+        if parse_address(args['--address'])[1] == 0:
+            logging.error('Workers need the --address of the coordinator.')
+            sys.exit(1)
+        worker_runner(args['--address'], cgroup)
+        return
+
     modules, test_cases = parse_args(args)
 
     # CWD and temp dir setup
@@ -713,10 +4278,163 @@ def main():
     flags = {
         'side-by-side': args['--side-by-side'],
         'memory-check': args['--valgrind'],
-        'exec-class': not args['--no-exec-class']
+        'exec-class': not args['--no-exec-class'],
+        'live-diff': args['--live-diff'],
+        'profile': args['--profile'],
+        'sanitize': args['--sanitize']
     }
     logging.debug("Additional Flags: " + pformat(flags))
 
+    if args['history']:
+        history_query(args, modules[0])
+        return
+
+    if args['--sanitize'] and args['--valgrind']:
+        logging.error('Sanitized executables cannot run under valgrind.')
+        sys.exit(1)
+
+    jobs = int(args['--jobs']) or os.cpu_count() or 1
+
+    limits = parse_limits(args['--limits'])
+    check_limits(limits)
+    cgroup = os.path.abspath(args['--cgroup']) if args['--cgroup'] else ''
+    if cgroup:
+        setup_cgroup(cgroup)
+
+    tier = args['--tier'] or ''
+
+    if args['distill']:
+        distill_runner(
+            modules[0],
+            test_cases,
+            flags,
+            jobs,
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if args['reduce']:
+        reduce_runner(
+            modules[0],
+            int(args['<test>']),
+            flags,
+            jobs,
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup
+        )
+        return
+
+    if args['bench']:
+        bench_runner(
+            modules[0],
+            test_cases,
+            dict(flags, **{'exec-class': False, 'sanitize': False}),
+            jobs,
+            float(args['--tolerance']) / 100,
+            args['--against'],
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if args['serve']:
+        worker_args = ['--verbose'] if args['--verbose'] else []
+        if cgroup:
+            worker_args.append(f'--cgroup={cgroup}')
+        serve_runner(
+            modules[0],
+            test_cases,
+            flags,
+            args['--address'],
+            int(args['--local-workers']),
+            worker_args,
+            result_dir=args['--save'] if args['--save'] else '',
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        logging.info('Done.')
+        return
+
+    if args['ab']:
+        ab_runner(
+            modules[0],
+            test_cases,
+            flags,
+            jobs,
+            args['--baseline'],
+            args['--candidate'],
+            int(args['--repeat']),
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if args['regen']:
+        regen_runner(
+            modules[0],
+            test_cases,
+            flags,
+            jobs,
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if args['fuzz']:
+        fuzz_runner(
+            modules[0],
+            test_cases,
+            flags,
+            jobs,
+            int(args['--iterations']),
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if args['watch']:
+        watch_runner(
+            modules[0],
+            test_cases,
+            flags,
+            interval=float(args['--interval']),
+            result_dir=args['--save'] if args['--save'] else '',
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        return
+
+    if len(modules) > 1:
+        scheduler_runner(
+            modules,
+            test_cases,
+            flags,
+            jobs,
+            result_dir=args['--save'] if args['--save'] else '',
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
+        )
+        logging.info('Done.')
+        return
+
     for exec in modules:
         logging.info(f'Running {exec} tests...')
         test_runner(
@@ -724,7 +4442,10 @@ def main():
             test_cases,
             flags,
             result_dir=args['--save'] if args['--save'] else '',
-            stream=stream
+            stream=stream,
+            limits=limits,
+            cgroup=cgroup,
+            tier=tier
         )
 
     logging.info('Done.')
@@ -0,0 +1,31 @@
+import pytest
+
+from pytest_ampl import load_test_script
+
+
+@pytest.fixture
+def scanner_test(tmp_path):
+    """
+    A scanner test whose directories are in a temporary directory.
+    """
+
+    for name in ('src', 'bin', 'scanner', 'temp'):
+        (tmp_path / name).mkdir()
+
+    return load_test_script().ScannerTest(
+        [], str(tmp_path / 'src'), str(tmp_path / 'bin'),
+        str(tmp_path / 'scanner'), str(tmp_path / 'temp'))
+
+
+@pytest.fixture
+def checkout(tmp_path, monkeypatch):
+    """
+    A checkout with an empty scanner test directory, which is the working
+    directory.
+    """
+
+    for name in ('src', 'bin', 'test/scanner'):
+        (tmp_path / name).mkdir(parents=True)
+
+    monkeypatch.chdir(tmp_path / 'test')
+    return tmp_path
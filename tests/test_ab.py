@@ -0,0 +1,42 @@
+import random
+import statistics
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+def test_bootstrap_interval():
+    rng = random.Random(0)
+    sample = [rng.gauss(10, 1) for _ in range(50)]
+
+    estimate, low, high = ampl.bootstrap([sample], statistics.mean, random.Random(1))
+
+    assert estimate == statistics.mean(sample)
+    assert low < estimate < high
+    # About two standard errors either side
+    assert 0.2 < high - low < 1.2
+
+
+def test_bootstrap_constant():
+    assert ampl.bootstrap([[3.0] * 10], statistics.median, random.Random(0)) == (3.0, 3.0, 3.0)
+
+
+def test_bootstrap_resamples_each_sample():
+    rng = random.Random(0)
+    before = [rng.gauss(10, 0.1) for _ in range(30)]
+    after = [rng.gauss(12, 0.1) for _ in range(30)]
+
+    def change(a, b):
+        return statistics.median(b) / statistics.median(a) - 1
+
+    estimate, low, high = ampl.bootstrap([before, after], change, random.Random(1), resamples=200)
+
+    assert 0.15 < low <= estimate <= high < 0.25
+
+
+def test_bootstrap_is_reproducible():
+    sample = [1.0, 2.0, 4.0, 8.0, 16.0]
+
+    assert ampl.bootstrap([sample], statistics.mean, random.Random(7)) == \
+        ampl.bootstrap([sample], statistics.mean, random.Random(7))
@@ -0,0 +1,93 @@
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+CACHEGRIND = """\
+desc: I1 cache:         32768 B, 64 B, 8-way associative
+cmd: ../bin/testscanner 0.in
+events: Ir I1mr ILmr Dr D1mr DLmr Dw D1mw DLmw
+fl=stub.c
+fn=main
+12 4 1 1 2 0 0 1 0 0
+summary: {Ir} 10 5 300 20 4 200 30 2
+"""
+
+MASSIF = """\
+desc: (none)
+cmd: ../bin/testscanner 0.in
+time_unit: i
+#-----------
+snapshot=0
+#-----------
+time=0
+mem_heap_B=0
+mem_heap_extra_B=0
+mem_stacks_B=0
+heap_tree=empty
+#-----------
+snapshot=1
+#-----------
+time=1000
+mem_heap_B={heap}
+mem_heap_extra_B=24
+mem_stacks_B=0
+heap_tree=peak
+#-----------
+snapshot=2
+#-----------
+time=2000
+mem_heap_B=100
+mem_heap_extra_B=8
+mem_stacks_B=0
+heap_tree=empty
+"""
+
+
+@pytest.fixture
+def benchmark(scanner_test, tmp_path, monkeypatch):
+    """
+    A benchmark whose valgrind runs write the output in `profile`, which maps
+    a case to its instructions and heap peak.
+    """
+
+    profile = {}
+
+    def valgrind(case, tool_args, log, stage):
+        out = next(arg.split('=', 1)[1] for arg in tool_args if arg.endswith(f'{case}.{stage}'))
+        instructions, heap = profile[case]
+        with open(out, 'w') as f:
+            f.write(CACHEGRIND.format(Ir=instructions) if stage == 'cachegrind' else MASSIF.format(heap=heap))
+        return 0
+
+    scanner_test._test_names = [0, 1]
+    monkeypatch.setattr(scanner_test, 'valgrind', valgrind)
+    benchmark = ampl.Benchmark(scanner_test, str(tmp_path / 'benchmarks'), 2)
+    benchmark.profile = profile
+    return benchmark
+
+
+def test_measure(benchmark):
+    benchmark.profile[0] = (1000, 4000)
+
+    assert benchmark.measure(0) == {
+        'instructions': 1000, 'l1_misses': 10 + 20 + 30, 'll_misses': 5 + 4 + 2, 'peak_heap': 4024}
+
+
+def test_measure_timeout(benchmark, monkeypatch):
+    monkeypatch.setattr(benchmark._test, 'valgrind', lambda *args: -1)
+
+    assert benchmark.measure(0) == {}
+
+
+@pytest.mark.parametrize('instructions, passed', [(1005, True), (900, True), (1020, False)])
+def test_tolerance(benchmark, monkeypatch, instructions, passed):
+    benchmark.profile.update({0: (1000, 4000), 1: (2000, 100)})
+    monkeypatch.setattr(benchmark, 'commit', lambda rev='HEAD': 'base')
+    assert benchmark.run(0.01)
+
+    benchmark.profile[0] = (instructions, 4000)
+    monkeypatch.setattr(benchmark, 'commit', lambda rev='HEAD': 'head' if rev == 'HEAD' else rev)
+    assert benchmark.run(0.01, against='base') == passed
+    assert benchmark._load('head')['0']['instructions'] == instructions
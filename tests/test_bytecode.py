@@ -0,0 +1,140 @@
+import os
+import struct
+import zipfile
+
+import pytest
+
+from pytest_ampl import ROOT, load_test_script
+
+ampl = load_test_script()
+
+NOP = b'\x00'
+RETURN = b'\xb1'
+
+
+def tableswitch(pc: int, low: int, high: int) -> bytes:
+    """
+    A tableswitch at `pc`, padded so its operands are 4-byte aligned.
+    """
+
+    return (b'\xaa' + NOP * (3 - pc % 4) + struct.pack('>iii', 0, low, high)
+            + struct.pack('>i', 0) * (high - low + 1))
+
+
+def lookupswitch(pc: int, keys: list[int]) -> bytes:
+    """
+    A lookupswitch at `pc`, padded so its operands are 4-byte aligned.
+    """
+
+    return (b'\xab' + NOP * (3 - pc % 4) + struct.pack('>ii', 0, len(keys))
+            + b''.join(struct.pack('>ii', key, 0) for key in keys))
+
+
+def utf8(s: str) -> bytes:
+    return struct.pack('>BH', 1, len(s)) + s.encode()
+
+
+def method(name: int, descriptor: int, code_attribute: int,
+           max_stack: int, max_locals: int, code: bytes) -> bytes:
+    """
+    A method with a Code attribute without exception handlers or attributes.
+    """
+
+    body = struct.pack('>HHI', max_stack, max_locals, len(code)) + code + struct.pack('>HH', 0, 0)
+    return (struct.pack('>HHHH', 0x0009, name, descriptor, 1)
+            + struct.pack('>HI', code_attribute, len(body)) + body)
+
+
+def test_operands():
+    # iconst_0, bipush, sipush, ldc, iinc, invokeinterface, multianewarray, return
+    code = (b'\x03' + b'\x10\x05' + b'\x11\x01\x00' + b'\x12\x01' + b'\x84\x01\xff'
+            + b'\xb9\x00\x01\x01\x00' + b'\xc5\x00\x01\x02' + RETURN)
+
+    assert ampl.count_instructions(code) == 8
+
+
+@pytest.mark.parametrize('pc', range(4))
+def test_tableswitch_padding(pc):
+    code = NOP * pc + tableswitch(pc, -1, 2) + RETURN
+
+    assert ampl.count_instructions(code) == pc + 2
+
+
+@pytest.mark.parametrize('pc', range(4))
+def test_lookupswitch_padding(pc):
+    code = NOP * pc + lookupswitch(pc, [-5, 0, 7]) + RETURN
+
+    assert ampl.count_instructions(code) == pc + 2
+
+
+def test_wide():
+    # wide iinc 256 by 1000, wide iload 256, istore_0, return
+    code = b'\xc4\x84\x01\x00\x03\xe8' + b'\xc4\x15\x01\x00' + b'\x3b' + RETURN
+
+    assert ampl.count_instructions(code) == 4
+
+
+def test_class_metrics(tmp_path):
+    constants = [
+        utf8('Code'),                                   # 1
+        struct.pack('>Bq', 5, 1 << 40),                 # 2 (and 3)
+        struct.pack('>Bd', 6, 0.5),                     # 4 (and 5)
+        utf8('Test'),                                   # 6
+        struct.pack('>BH', 7, 6),                       # 7
+        utf8('java/lang/Object'),                       # 8
+        struct.pack('>BH', 7, 8),                       # 9
+        utf8('main'),                                   # 10
+        utf8('()V'),                                    # 11
+        utf8('ConstantValue'),                          # 12
+        struct.pack('>Bi', 3, 42),                      # 13
+        utf8('I'),                                      # 14
+    ]
+    switch = b'\x03' + tableswitch(1, 0, 1) + RETURN * 3
+    wide = b'\xc4\x84\x01\x00\x00\x01' + RETURN
+
+    data = (struct.pack('>IHHH', 0xCAFEBABE, 0, 50, 15) + b''.join(constants)
+            + struct.pack('>HHHH', 0x0021, 7, 9, 0)
+            # A field with a constant value
+            + struct.pack('>H', 1)
+            + struct.pack('>HHHHH', 0x0018, 10, 14, 1, 12) + struct.pack('>IH', 2, 13)
+            + struct.pack('>H', 2)
+            + method(10, 11, 1, 1, 1, switch)
+            + method(10, 11, 1, 2, 300, wide)
+            + struct.pack('>H', 0))
+    path = tmp_path / 'Test.class'
+    path.write_bytes(data)
+
+    assert ampl.class_metrics(str(path)) == {
+        'constants': 14,
+        'methods': 2,
+        'instructions': 7,
+        'code_bytes': len(switch) + len(wide),
+        'max_stack': 2,
+        'max_locals': 300,
+    }
+
+
+@pytest.mark.parametrize('data', [
+    b'\xca\xfe\xba\xbf' + bytes(6),
+    # Truncated in the constant pool
+    b'\xca\xfe\xba\xbe\x00\x00\x00\x32\x00\x05\x01',
+])
+def test_class_metrics_invalid(tmp_path, data):
+    path = tmp_path / 'Test.class'
+    path.write_bytes(data)
+
+    with pytest.raises(ValueError):
+        ampl.class_metrics(str(path))
+
+
+def test_class_metrics_jasmin(tmp_path):
+    with zipfile.ZipFile(os.path.join(ROOT, 'jasmin.jar')) as jar:
+        classes = [name for name in jar.namelist() if name.endswith('.class')]
+        jar.extractall(tmp_path, classes)
+
+    for name in classes:
+        metrics = ampl.class_metrics(str(tmp_path / name))
+        assert metrics['constants'] > 0, name
+        assert metrics['code_bytes'] >= metrics['instructions'], name
+        if metrics['code_bytes']:
+            assert metrics['instructions'] > 0, name
@@ -0,0 +1,99 @@
+import base64
+import os
+import socket
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+CASES = list(range(6))
+FLAGS = {'side-by-side': False, 'memory-check': False, 'exec-class': False}
+
+# Echoes the expected output of a case, and kills its worker the first time it
+# runs case 3
+STUB = '''#!/bin/sh
+case "$1" in
+*/3.in) mkdir "$0.killed" 2>/dev/null && kill -9 $PPID && sleep 5 ;;
+esac
+cat "${1%.in}.out"
+cat "${1%.in}.err" >&2
+'''
+
+
+@pytest.fixture
+def tree(checkout):
+    """
+    A checkout with scanner cases and a stub scanner.
+    """
+
+    for case in CASES:
+        (checkout / 'test/scanner' / f'{case}.in').write_text(f'{case}\n')
+        (checkout / 'test/scanner' / f'{case}.out').write_text(f'token {case}\n')
+        (checkout / 'test/scanner' / f'{case}.err').write_text('')
+    stub = checkout / 'bin/testscanner'
+    stub.write_text(STUB)
+    stub.chmod(0o755)
+
+    return checkout
+
+
+def create_test(tree):
+    return ampl.create_test('scanner', CASES, FLAGS, cwd=str(tree / 'test'))
+
+
+def test_serve_local_workers(tree):
+    test = create_test(tree)
+    os.makedirs(test._temp_dir)
+
+    coordinator = ampl.Coordinator(test, '127.0.0.1:0')
+    coordinator.run(2, [])
+
+    assert test._results == {case: True for case in CASES}
+    assert coordinator._attempts == {3: 1}
+    assert (tree / 'bin/testscanner.killed').is_dir()
+
+
+def test_retries_exhausted(tree):
+    test = create_test(tree)
+    coordinator = ampl.Coordinator(test, '127.0.0.1:0')
+    coordinator._pending.remove(3)
+
+    for attempt in range(coordinator.RETRIES):
+        coordinator._lost(3, 'worker')
+        assert coordinator._pending.pop(0) == 3
+    coordinator._lost(3, 'worker')
+
+    assert coordinator._pending == [case for case in CASES if case != 3]
+    assert test._results[3] is False
+    assert 3 not in coordinator._remaining
+
+
+def test_artifact_names(tree):
+    test = create_test(tree)
+    os.makedirs(test._temp_dir)
+    coordinator = ampl.Coordinator(test, '127.0.0.1:0')
+
+    output = base64.b64encode(b'token 1\n').decode()
+    coordinator._complete(1, {
+        'worker': 'worker', 'passed': True, 'returncode': 0, 'stats': {},
+        'breach': None, 'findings': [], 'bytecode': None,
+        'artifacts': {'1.out': output, '../1.out': output, '2.out': output},
+    })
+
+    assert os.listdir(test._temp_dir) == ['1.out']
+    assert test._results[1] is True
+
+
+def test_keepalive(tree):
+    coordinator = ampl.Coordinator(create_test(tree), '127.0.0.1:0')
+
+    with socket.create_server(('127.0.0.1', 0)) as server:
+        client = socket.create_connection(server.getsockname())
+        sock, _ = server.accept()
+        client.close()
+
+        with sock:
+            coordinator.handle(sock)
+            assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+@pytest.fixture
+def fuzzer(scanner_test, tmp_path):
+    return ampl.Fuzzer(scanner_test, str(tmp_path / 'fuzz'), 1)
+
+
+def saved(tmp_path, kind):
+    return sorted(os.listdir(tmp_path / 'fuzz' / kind))
+
+
+@pytest.mark.parametrize('signature', [
+    ('signal', 11, ''),
+    ('timeout',),
+    ('exit', 1, 'SUMMARY: AddressSanitizer: heap-buffer-overflow stub.c:12 in main'),
+    ('exit', 0, "stub.c:5:3: runtime error: signed integer overflow"),
+])
+def test_crashes_and_hangs(fuzzer, tmp_path, signature):
+    fuzzer._triage('boom\n', signature, set(), seed=True)
+    fuzzer._triage('boom boom\n', signature, set(), seed=False)
+
+    kind = 'hangs' if signature[0] == 'timeout' else 'crashes'
+    assert len(saved(tmp_path, kind)) == 1
+    assert fuzzer._queue == []
+
+
+def test_new_behaviour(fuzzer, tmp_path):
+    fuzzer._triage('a\n', ('exit', 1, '<input>:1:1: error: unexpected a'), set(), seed=True)
+    fuzzer._triage('b\n', ('exit', 1, '<input>:1:1: error: unexpected a'), set(), seed=False)
+    fuzzer._triage('c\n', ('exit', 1, '<input>:1:1: error: unexpected c'), set(), seed=False)
+
+    assert fuzzer._queue == ['a\n', 'c\n']
+    assert len(saved(tmp_path, 'queue')) == 1
+    assert saved(tmp_path, 'crashes') == []
+
+
+def test_nothing_to_mutate(fuzzer, monkeypatch):
+    monkeypatch.setattr(fuzzer, '_run', lambda content: (('signal', 6, ''), set()))
+
+    fuzzer.fuzz(['boom\n', 'bang\n'], 100)
+
+    assert fuzzer._queue == []
+    assert len(fuzzer._findings) == 1
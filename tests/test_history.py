@@ -0,0 +1,99 @@
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+METRICS = {'constants': 10, 'methods': 2, 'instructions': 30, 'code_bytes': 40,
+           'max_stack': 3, 'max_locals': 4}
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ampl.History(str(tmp_path / 'artifacts' / 'history.db'))
+
+
+def record(history, test, started, results, seconds, executable=b'amplc v1', class_seconds={}):
+    """
+    Records a run of the test with the given results and durations.
+    """
+
+    with open(f'{test._bin_dir}/{test.EXEC}', 'wb') as f:
+        f.write(executable)
+
+    test._results = dict(results)
+    test._stats = {case: {'execute': (seconds[case], 1000 + case)} for case in results}
+    for case, duration in class_seconds.items():
+        test._stats[case]['execute_class'] = (duration, 0)
+
+    return history.record(test, started)
+
+
+def test_runs(history, scanner_test):
+    first = record(history, scanner_test, '2026-01-01 10:00:00',
+                   {0: True, 1: False}, {0: 0.1, 1: 0.2})
+    second = record(history, scanner_test, '2026-01-02 10:00:00',
+                    {0: True, 1: True}, {0: 0.1, 1: 0.2}, b'amplc v2')
+
+    runs = history.runs('scanner', 10)
+
+    assert [(run, started, passed, cases) for run, started, _, passed, cases in runs] == [
+        (second, '2026-01-02 10:00:00', 2, 2),
+        (first, '2026-01-01 10:00:00', 1, 2),
+    ]
+    assert runs[0][2] != runs[1][2]
+    assert history.runs('scanner', 1) == runs[:1]
+    assert history.runs('parser', 10) == []
+
+
+def test_slowest(history, scanner_test):
+    record(history, scanner_test, '2026-01-01 10:00:00',
+           {0: True, 1: True, 2: True}, {0: 0.1, 1: 1.1, 2: 0.5})
+    record(history, scanner_test, '2026-01-02 10:00:00',
+           {0: True, 1: True, 2: True}, {0: 0.1, 1: 0.05, 2: 0.5})
+
+    slowest = history.slowest('scanner', 'execute', 10, 2)
+
+    assert [(case, samples) for case, _, _, _, samples in slowest] == [(1, 2), (2, 2)]
+    assert slowest[0][1:4] == (pytest.approx(0.575), 1.1, 1001)
+
+    # Only the most recent run
+    assert [row[0] for row in history.slowest('scanner', 'execute', 1, 3)] == [2, 0, 1]
+
+
+def test_case(history, scanner_test):
+    scanner_test._failed_streams = {1: ['err']}
+    scanner_test._breaches = {1: 'cpu'}
+    first = record(history, scanner_test, '2026-01-01 10:00:00',
+                   {0: True, 1: False}, {0: 0.1, 1: 0.2})
+    scanner_test._failed_streams = {}
+    scanner_test._breaches = {}
+    scanner_test._returncodes = {1: -1}
+    second = record(history, scanner_test, '2026-01-02 10:00:00',
+                    {0: True, 1: False}, {0: 0.1, 1: 0.3})
+
+    rows = history.case('scanner', 1, 10)
+
+    # Oldest first
+    assert [(run, passed, failures, seconds) for run, _, _, passed, failures, seconds in rows] == [
+        (first, 0, 'err,limit:cpu', 0.2),
+        (second, 0, 'timeout', 0.3),
+    ]
+    assert [row[0] for row in history.case('scanner', 1, 1)] == [second]
+
+
+def test_bytecode(history, scanner_test):
+    scanner_test._bytecode = {0: METRICS, 1: dict(METRICS, max_stack=7)}
+    first = record(history, scanner_test, '2026-01-01 10:00:00',
+                   {0: True, 1: True}, {0: 0.1, 1: 0.2}, class_seconds={0: 0.5, 1: 0.25})
+    scanner_test._bytecode = {0: dict(METRICS, instructions=20)}
+    second = record(history, scanner_test, '2026-01-02 10:00:00',
+                    {0: True}, {0: 0.1})
+
+    # Newest first, summed over the cases
+    assert [row[:2] + row[3:] for row in history.bytecode('scanner', 10)] == [
+        (second, '2026-01-02 10:00:00', 1, 20, 40, 2, 10, 3, 4, None),
+        (first, '2026-01-01 10:00:00', 2, 60, 80, 4, 20, 7, 4, 0.75),
+    ]
+    assert [row[:2] for row in history.case_bytecode('scanner', 0, 10)] == [(first, 30), (second, 20)]
+    assert history.case_bytecode('scanner', 1, 10) == [(first, 30, 40, 2, 10, 7, 4, 0.25)]
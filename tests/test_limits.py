@@ -0,0 +1,83 @@
+import os
+import shutil
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+requires_prlimit = pytest.mark.skipif(not shutil.which('prlimit'), reason='prlimit is not installed')
+
+
+def test_parse_limits():
+    assert ampl.parse_limits('cpu=300,mem=4096,fsize=256,nproc=0') == \
+        {'cpu': 300, 'mem': 4096, 'fsize': 256}
+    assert ampl.parse_limits('mem=512,') == {'mem': 512}
+    assert ampl.parse_limits('') == {}
+
+
+@pytest.mark.parametrize('spec', ['stack=8', 'mem', 'mem=', 'mem=-1', 'cpu=1.5', 'cpu=300;mem=1'])
+def test_parse_limits_invalid(spec):
+    with pytest.raises(SystemExit):
+        ampl.parse_limits(spec)
+
+
+def test_mem_breach_without_cgroup(scanner_test):
+    scanner_test._limits = {'mem': 100}
+
+    assert scanner_test._limit_breach(1, '', 100 * 1024) == 'mem'
+    assert scanner_test._limit_breach(-11, '', 60 * 1024) == 'mem'
+    # Far below the limit, successful, timed out or not under the limit
+    assert scanner_test._limit_breach(1, '', 10 * 1024) is None
+    assert scanner_test._limit_breach(0, '', 100 * 1024) is None
+    assert scanner_test._limit_breach(-1, '', 100 * 1024) is None
+    assert scanner_test._limit_breach(1, '', 0) is None
+
+
+@requires_prlimit
+def test_limit_command(monkeypatch):
+    monkeypatch.setattr(ampl.resource, 'getrlimit', lambda rlimit: (-1, -1))
+
+    assert ampl.limit_command({}) == []
+    assert ampl.limit_command({'cpu': 300, 'mem': 10}) == \
+        ['prlimit', '--cpu=300:301', '--as=10485760:10485760', '--']
+    assert ampl.limit_command({}, '/cgroup/ampl/0')[-1] == '/cgroup/ampl/0'
+
+
+@requires_prlimit
+@pytest.mark.parametrize('hard, expected', [(300, '--cpu=300:300'), (200, '--cpu=200:200'), (400, '--cpu=300:301')])
+def test_limit_command_below_hard_limit(monkeypatch, hard, expected):
+    monkeypatch.setattr(ampl.resource, 'getrlimit', lambda rlimit: (hard, hard))
+
+    assert ampl.limit_command({'cpu': 300}) == ['prlimit', expected, '--']
+
+
+def stub(scanner_test, script):
+    """
+    Installs a shell script as the executable of a scanner test.
+    """
+
+    path = f'{scanner_test._bin_dir}/{scanner_test.EXEC}'
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\n' + script)
+    os.chmod(path, 0o755)
+
+
+@requires_prlimit
+def test_rerun_after_breach(scanner_test, tmp_path):
+    (tmp_path / 'scanner' / '0.in').write_text('')
+    (tmp_path / 'scanner' / '0.out').write_text('ok\n')
+    (tmp_path / 'scanner' / '0.err').write_text('')
+    scanner_test._limits = {'fsize': 1}
+
+    stub(scanner_test, 'exec head -c 3000000 /dev/zero\n')
+    assert not scanner_test.run_case(0)
+    assert scanner_test._breaches == {0: 'fsize'}
+    assert scanner_test._failed_streams == {0: ['out']}
+
+    # The fixed executable passes
+    stub(scanner_test, 'echo ok\n')
+    assert scanner_test.run_case(0)
+    assert scanner_test._breaches == {}
+    assert scanner_test._failed_streams == {}
@@ -0,0 +1,85 @@
+import os
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(ampl.LiveComparison, 'CHUNK', 4)
+    monkeypatch.setattr(ampl.LiveComparison, 'SLACK', 0)
+
+
+def compare(tmp_path, expected, output, compare=True):
+    """
+    Streams the output through a live comparison with the expected output.
+
+    :return: The comparison, the copied output and the number of divergences
+    """
+
+    expected_path = tmp_path / '0.out'
+    if expected is not None:
+        expected_path.write_bytes(expected)
+
+    diverged = []
+    read, write = os.pipe()
+    with open(read, 'rb') as pipe, open(tmp_path / 'copy', 'wb') as out:
+        comparison = ampl.LiveComparison(
+            pipe, out, str(expected_path), compare, lambda: diverged.append(True))
+        comparison.start()
+        with open(write, 'wb') as f:
+            f.write(output)
+        comparison.join()
+
+    return comparison, (tmp_path / 'copy').read_bytes(), len(diverged)
+
+
+@pytest.mark.parametrize('output, offset', [
+    (b'abcdefgh\n', None),
+    (b'abcdefXh\n', 6),
+    (b'abcdXfgh\n', 4),
+    (b'Xbcdefgh\n', 0),
+    (b'abcdefgh\nextra\n', 9),
+    # Missing output is left to the diff
+    (b'abc', None),
+])
+def test_divergence_offset(tmp_path, output, offset):
+    comparison, copy, diverged = compare(tmp_path, b'abcdefgh\n', output)
+
+    assert comparison.offset == offset
+    assert diverged == (offset is not None)
+    assert copy == output
+
+
+def test_context_after_divergence(tmp_path, monkeypatch):
+    monkeypatch.setattr(ampl.LiveComparison, 'CONTEXT', 4)
+
+    comparison, copy, diverged = compare(tmp_path, b'a' * 8, b'a' * 5 + b'b' * 95)
+
+    # The chunk with the divergence, and the chunks within CONTEXT of it
+    assert comparison.offset == 5
+    assert diverged == 1
+    assert copy == b'a' * 5 + b'b' * 7
+
+
+@pytest.mark.parametrize('size, offset', [
+    (20, None),
+    (21, 20),
+    (100, 20),
+])
+def test_size_margin(tmp_path, size, offset):
+    comparison, _, diverged = compare(tmp_path, b'x' * 10, b'y' * size, compare=False)
+
+    assert comparison.offset == offset
+    assert diverged == (offset is not None)
+
+
+def test_no_expected_output(tmp_path):
+    comparison, copy, diverged = compare(tmp_path, None, b'y' * 100)
+
+    assert comparison.offset is None
+    assert diverged == 0
+    assert copy == b'y' * 100
@@ -0,0 +1,93 @@
+import os
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+def write_err(test, case, text):
+    with open(f'{test._temp_dir}/{case}.err', 'w') as f:
+        f.write(text)
+
+
+def test_signature_masks_input(scanner_test, tmp_path):
+    path = str(tmp_path / 'abc123.in')
+    scanner_test._returncodes['abc123'] = 1
+    write_err(scanner_test, 'abc123', f'\n{path}:12:3: error: unexpected token\nmore\n')
+
+    assert ampl.failure_signature(scanner_test, 'abc123', path) == \
+        ('exit', 1, '<input>:L:C: error: unexpected token')
+
+    # The same failure of a smaller input has the same signature
+    path = str(tmp_path / 'def456.in')
+    scanner_test._returncodes['def456'] = 1
+    write_err(scanner_test, 'def456', f'{path}:1:7: error: unexpected token\n')
+
+    assert ampl.failure_signature(scanner_test, 'def456', path) == \
+        ('exit', 1, '<input>:L:C: error: unexpected token')
+
+
+def test_signature_prefers_sanitizer_summary(scanner_test, tmp_path):
+    scanner_test._returncodes[0] = -6
+    write_err(scanner_test, 0, '==99==ERROR: AddressSanitizer: heap-use-after-free on 0x6020deadbeef\n'
+                               'SUMMARY: AddressSanitizer: heap-use-after-free stub.c:9 in main\n')
+
+    assert ampl.failure_signature(scanner_test, 0, str(tmp_path / '0.in')) == \
+        ('signal', 6, 'SUMMARY: AddressSanitizer: heap-use-after-free stub.c:9 in main')
+
+
+def test_signature_keeps_other_numbers(scanner_test, tmp_path):
+    path = str(tmp_path / '0.in')
+    scanner_test._returncodes[0] = 1
+    write_err(scanner_test, 0, f'amplc: {path}:3:9: error: f expects 2 arguments, got 3\n')
+
+    assert ampl.failure_signature(scanner_test, 0, path) == \
+        ('exit', 1, 'amplc: <input>:L:C: error: f expects 2 arguments, got 3')
+
+
+def test_wrong_output(scanner_test, tmp_path):
+    test_dir = tmp_path / 'scanner'
+    (test_dir / '0.out').write_text('a\nb\nb\nc\n')
+    (test_dir / '0.err').write_text('amplc: 0.in:3:4: error: unexpected c\n')
+    (tmp_path / 'temp' / '0.out').write_text('a\nb\nx\nb\nb\n')
+    write_err(scanner_test, 0, 'amplc: 0.in:3:5: error: unexpected c\n')
+    scanner_test._failed_streams[0] = ['out', 'err']
+
+    # A wrong location cannot be told apart from the right one
+    assert ampl.wrong_output(scanner_test, 0, str(test_dir / '0.in')) == [('out', 'b'), ('out', 'x')]
+
+
+def test_reduce_by_wrong_output(scanner_test, tmp_path):
+    path = f'{scanner_test._bin_dir}/{scanner_test.EXEC}'
+    with open(path, 'w') as f:
+        f.write('#!/bin/sh\ngrep -qx x "$1" && grep -qx y "$1" && echo wrong\necho right\n')
+    os.chmod(path, 0o755)
+
+    reducer = ampl.Reducer(scanner_test, str(tmp_path / 'reduce'), 2)
+
+    assert reducer.reduce('a\nx\nb\ny\nc\n', ('exit', 0, ''), [('out', 'wrong')]) == 'x\ny\n'
+
+
+def test_signature_timeout(scanner_test, tmp_path):
+    scanner_test._returncodes[0] = -1
+
+    assert ampl.failure_signature(scanner_test, 0, str(tmp_path / '0.in')) == ('timeout',)
+
+
+@pytest.mark.parametrize('needed', [['b', 'e'], ['a'], ['g'], list('abcdefg')])
+def test_ddmin(scanner_test, tmp_path, needed):
+    reducer = ampl.Reducer(scanner_test, str(tmp_path / 'reduce'), 2)
+    reducer._reproduces = lambda content: all(unit in content for unit in needed)
+
+    assert reducer._ddmin(list('abcdefg')) == needed
+
+
+def test_ddmin_keeps_order(scanner_test, tmp_path):
+    reducer = ampl.Reducer(scanner_test, str(tmp_path / 'reduce'), 1)
+    reducer._reproduces = lambda content: 'x = 1;' in content and 'print x;' in content
+
+    units = ['int x;\n', 'x = 1;\n', 'y = 2;\n', 'print y;\n', 'print x;\n']
+
+    assert reducer._ddmin(units) == ['x = 1;\n', 'print x;\n']
@@ -0,0 +1,102 @@
+import os
+import shutil
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+FLAGS = {'side-by-side': False, 'memory-check': False, 'exec-class': False}
+
+requires_prlimit = pytest.mark.skipif(not shutil.which('prlimit'), reason='prlimit is not installed')
+
+# Writes its input to stdout, hangs on case 3 and writes too much on case 4
+STUB = '''#!/bin/sh
+case "$1" in
+*/3.in) exec sleep 3 ;;
+*/4.in) exec head -c 3000000 /dev/zero ;;
+esac
+cat "$1"
+'''
+
+
+@pytest.fixture
+def scanner(checkout, monkeypatch):
+    """
+    The scanner test directory of a checkout with a stub scanner, which is
+    already made.
+    """
+
+    stub = checkout / 'bin/testscanner'
+    stub.write_text(STUB)
+    stub.chmod(0o755)
+    monkeypatch.setattr(ampl.ScannerTest, 'make', lambda self, clean=True: True)
+
+    return checkout / 'test/scanner'
+
+
+def write_case(scanner, case, **files):
+    for suffix, content in files.items():
+        (scanner / f'{case}.{suffix}').write_text(content)
+
+
+def inodes(scanner):
+    return {path.name: path.stat().st_ino for path in scanner.iterdir()}
+
+
+def regen(scanner, cases, **kwargs):
+    ampl.regen_runner('scanner', cases, FLAGS, 2, cwd=str(scanner.parent), **kwargs)
+
+
+def test_regen(scanner, monkeypatch):
+    write_case(scanner, 0, **{'in': 'same\n', 'out': 'same\n', 'err': ''})
+    write_case(scanner, 1, **{'in': 'new\n', 'out': 'old\n', 'err': ''})
+    write_case(scanner, 2, **{'in': 'added\n'})
+    write_case(scanner, 3, **{'in': 'hang\n', 'out': 'keep\n', 'err': 'keep\n'})
+    monkeypatch.setattr(ampl.BaseTest, 'timeout', lambda self, test, stage: 1)
+    before = inodes(scanner)
+
+    with pytest.raises(SystemExit):
+        regen(scanner, [0, 1, 2, 3])
+
+    after = inodes(scanner)
+    assert sorted(after) == sorted(list(before) + ['2.err', '2.out'])
+    assert [name for name in before if after[name] != before[name]] == ['1.out']
+
+    assert (scanner / '1.out').read_text() == 'new\n'
+    assert (scanner / '2.out').read_text() == 'added\n'
+    assert (scanner / '2.err').read_text() == ''
+    assert (scanner / '3.out').read_text() == 'keep\n'
+    assert (scanner / '3.err').read_text() == 'keep\n'
+
+
+@requires_prlimit
+def test_regen_breach(scanner):
+    write_case(scanner, 4, **{'in': 'big\n', 'out': 'keep\n', 'err': ''})
+    before = inodes(scanner)
+
+    with pytest.raises(SystemExit):
+        regen(scanner, [4], limits={'fsize': 1})
+
+    assert inodes(scanner) == before
+    assert (scanner / '4.out').read_text() == 'keep\n'
+
+
+def test_write_atomic(tmp_path, monkeypatch):
+    path = tmp_path / '0.out'
+    path.write_bytes(b'old\n')
+
+    ampl.write_atomic(str(path), b'new\n')
+    assert path.read_bytes() == b'new\n'
+    assert os.listdir(tmp_path) == ['0.out']
+
+    def replace(src, dst):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(os, 'replace', replace)
+    with pytest.raises(OSError):
+        ampl.write_atomic(str(path), b'newer\n')
+
+    assert path.read_bytes() == b'new\n'
+    assert os.listdir(tmp_path) == ['0.out']
@@ -0,0 +1,49 @@
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+UBSAN = [
+    'stub.c:5:3: runtime error: signed integer overflow: 2147483647 + 1 cannot be represented in type \'int\'\n',
+    '    #0 0x55d0c0a1b2c3 in main stub.c:5\n',
+    '    #1 0x7f1e2d3c4b5a in __libc_start_main\n',
+    '\n',
+]
+ASAN = [
+    '=================================================================\n',
+    '==1234==ERROR: AddressSanitizer: heap-buffer-overflow on address 0x602000000014\n',
+    '    #0 0x55d0c0a1b2c3 in main stub.c:9\n',
+    'SUMMARY: AddressSanitizer: heap-buffer-overflow stub.c:9 in main\n',
+]
+
+
+def sanitizer(tmp_path):
+    return ampl.Sanitizer(str(tmp_path / 'src'), str(tmp_path / 'sanitize'))
+
+
+def test_strip(tmp_path):
+    err = tmp_path / '0.err'
+    err.write_text(''.join(['error: unexpected token\n'] + UBSAN + ['2 errors\n'] + ASAN))
+
+    removed = sanitizer(tmp_path)._strip(str(err))
+
+    assert err.read_text() == 'error: unexpected token\n2 errors\n'
+    assert removed == ''.join(UBSAN + ASAN)
+
+
+def test_strip_runtime_error_without_trace(tmp_path):
+    err = tmp_path / '0.err'
+    err.write_text(UBSAN[0] + '\nerror: unexpected token\n')
+
+    removed = sanitizer(tmp_path)._strip(str(err))
+
+    assert err.read_text() == '\nerror: unexpected token\n'
+    assert removed == UBSAN[0]
+
+
+def test_strip_without_reports(tmp_path):
+    err = tmp_path / '0.err'
+    err.write_text('error: unexpected token\n    #0 is not a frame here\n')
+
+    assert sanitizer(tmp_path)._strip(str(err)) == ''
+    assert err.read_text() == 'error: unexpected token\n    #0 is not a frame here\n'
+    assert sanitizer(tmp_path)._strip(str(tmp_path / 'missing.err')) == ''
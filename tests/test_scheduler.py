@@ -0,0 +1,97 @@
+import os
+
+import pytest
+
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+@pytest.fixture
+def create(tmp_path):
+    """
+    Creates tests of a module class that share the source and bin directories.
+    """
+
+    for name in ('src', 'bin', 'temp'):
+        (tmp_path / name).mkdir()
+
+    def create(cls, module, cases=()):
+        (tmp_path / module).mkdir(exist_ok=True)
+        return cls(list(cases), str(tmp_path / 'src'), str(tmp_path / 'bin'),
+                   str(tmp_path / module), str(tmp_path / 'temp' / module))
+
+    return create
+
+
+def test_make_per_target(create, tmp_path, monkeypatch):
+    made = []
+
+    # Every target builds its executable into the shared bin directory, and
+    # the typechecking target fails so it falls back to the amplc target
+    def make(self, clean=True):
+        made.append((self.MAKE, clean))
+        if self.MAKE == 'testtypechecking':
+            return False
+        (tmp_path / 'bin' / self.EXEC).write_text(self.MAKE)
+        return True
+
+    monkeypatch.setattr(ampl.BaseTest, 'make', make)
+    parser = create(ampl.ParserTest, 'parser')
+    scanner = create(ampl.ScannerTest, 'scanner')
+    typechecking = create(ampl.TypecheckingTest, 'typechecking')
+    codegen = create(ampl.CodegenTest, 'codegen')
+    bin_dir = tmp_path / 'scheduler'
+
+    scheduler = ampl.Scheduler([parser, scanner, typechecking, codegen], str(bin_dir), 1)
+    assert scheduler.make() == [parser, scanner, typechecking, codegen]
+
+    assert made == [('testparser', True), ('testscanner', True),
+                    ('testtypechecking', True), ('amplc', True), ('amplc', True)]
+    assert parser._bin_dir == str(bin_dir / 'testparser')
+    assert (bin_dir / 'testparser' / 'amplc').read_text() == 'testparser'
+    assert (bin_dir / 'testscanner' / 'testscanner').read_text() == 'testscanner'
+    assert typechecking._bin_dir == str(bin_dir / 'testtypechecking')
+    assert (bin_dir / 'amplc' / 'amplc').read_text() == 'amplc'
+
+
+def test_make_error(create, tmp_path, monkeypatch):
+    def make(self, clean=True):
+        raise FileNotFoundError('make')
+
+    monkeypatch.setattr(ampl.BaseTest, 'make', make)
+    scanner = create(ampl.ScannerTest, 'scanner')
+
+    assert ampl.Scheduler([scanner], str(tmp_path / 'scheduler'), 1).make() == []
+
+
+def test_longest_first(create, tmp_path, monkeypatch):
+    timings = ampl.TimingStore(str(tmp_path / 'timings.json'))
+    durations = {
+        ('parser', 1): {'execute': 0.2},
+        ('parser', 2): {'execute': 0.1, 'mem_check': 0.5},
+        ('scanner', 1): {'execute': 0.3},
+    }
+    for (module, case), stages in durations.items():
+        for stage, seconds in stages.items():
+            for _ in range(3):
+                timings.record(f'{module}/{case}/{stage}', seconds)
+
+    parser = create(ampl.ParserTest, 'parser', [1, 2, 3])
+    scanner = create(ampl.ScannerTest, 'scanner', [1])
+    for test in (parser, scanner):
+        test._timings = timings
+
+    scheduler = ampl.Scheduler([parser, scanner], str(tmp_path / 'scheduler'), 1)
+    monkeypatch.setattr(scheduler, 'make', lambda: [parser, scanner])
+    order = []
+
+    def run_case(test, case):
+        order.append((os.path.basename(test._test_dir), case))
+        return True
+
+    monkeypatch.setattr(ampl.Scheduler, '_run_case', staticmethod(run_case))
+
+    assert scheduler.run()
+    # Cases that have not run before go first
+    assert order == [('parser', 3), ('parser', 2), ('scanner', 1), ('parser', 1)]
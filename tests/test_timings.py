@@ -0,0 +1,36 @@
+from pytest_ampl import load_test_script
+
+ampl = load_test_script()
+
+
+def test_percentile(tmp_path):
+    timings = ampl.TimingStore(str(tmp_path / 'timings.json'))
+    for duration in [0.5, 0.1, 0.4, 0.2, 0.3]:
+        timings.record('parser/5/execute', duration)
+
+    assert timings.percentile('parser/5/execute', 0.95) == 0.5
+    assert timings.percentile('parser/5/execute', 0.5) == 0.3
+    assert timings.percentile('parser/5/execute', 0.2) == 0.1
+    assert timings.percentile('parser/5/execute', 0) == 0.1
+
+
+def test_percentile_needs_samples(tmp_path):
+    timings = ampl.TimingStore(str(tmp_path / 'timings.json'))
+    timings.record('parser/5/execute', 0.1)
+    timings.record('parser/5/execute', 0.2)
+
+    assert timings.percentile('parser/5/execute', 0.95) is None
+    assert timings.percentile('parser/5/execute', 0.95, min_samples=2) == 0.2
+    assert timings.percentile('parser/6/execute', 0.95, min_samples=0) is None
+
+
+def test_percentile_of_recent_durations(tmp_path):
+    path = str(tmp_path / 'artifacts' / 'timings.json')
+    timings = ampl.TimingStore(path)
+    for i in range(ampl.TimingStore.HISTORY + 10):
+        timings.record('parser/5/execute', 10.0 if i < 10 else 1.0)
+    timings.save()
+
+    # The slow durations have been dropped, also from the saved file
+    assert timings.percentile('parser/5/execute', 1) == 1.0
+    assert ampl.TimingStore(path).percentile('parser/5/execute', 1) == 1.0